@@ -49,6 +49,8 @@ from satori.client.config import WebsocketsInfo as WebsocketsInfo
 
 from . import command as command
 from . import scheduler as scheduler
+from .bulk import BroadcastReport as BroadcastReport
+from .bulk import BulkItem as BulkItem
 from .config import BasicConfModel as BasicConfModel
 from .config import load_config as load_config
 from .core import Entari as Entari
@@ -68,6 +70,8 @@ from .event.send import SendResponse as SendResponse
 from .filter import filter_ as filter_
 from .localdata import local_data as local_data
 from .message import MessageChain as MessageChain
+from .paging import collect_pages as collect_pages
+from .paging import readahead as readahead
 from .plugin import Plugin as Plugin
 from .plugin import PluginMetadata as PluginMetadata
 from .plugin import add_service as add_service
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Hashable, Iterable
+from dataclasses import dataclass, field
+from typing import Generic, TypeVar
+
+from satori.client.account import Account
+from satori.model import MessageObject
+
+K = TypeVar("K")
+T = TypeVar("T")
+
+_END = object()
+
+
+@dataclass(slots=True)
+class BulkItem(Generic[K, T]):
+    """批量操作中单个目标的结果"""
+
+    target: K
+    result: T | None = None
+    error: Exception | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class _Pacer:
+    """按键限制调用速率，同一键下相邻两次调用的间隔不小于 `1 / rate`"""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0.0
+        self._next: dict[Hashable, float] = {}
+
+    async def wait(self, key: Hashable):
+        if not self.interval:
+            return
+        now = time.monotonic()
+        at = max(now, self._next.get(key, now))
+        self._next[key] = at + self.interval
+        if at > now:
+            await asyncio.sleep(at - now)
+
+
+async def bulk_run(
+    targets: Iterable[K],
+    func: Callable[[K], Awaitable[T]],
+    *,
+    concurrency: int = 8,
+    rate: float = 0,
+    key: Callable[[K], Hashable] | None = None,
+) -> AsyncIterator[BulkItem[K, T]]:
+    """以有限的并发对多个目标执行同一操作，并按完成顺序逐个产出结果
+
+    单个目标的失败不会中断其他目标，失败信息记录在 `BulkItem.error` 中。
+    提前结束迭代时，尚未开始的目标不会再被执行。
+
+    Args:
+        targets: 操作目标
+        func: 对单个目标执行的操作
+        concurrency: 最大并发数
+        rate: 每个键每秒最多执行的次数，为 0 时不限制
+        key: 计算目标所属的限速键 (例如账号)，默认所有目标共用同一个键
+    """
+    pending = iter(targets)
+    results: asyncio.Queue[BulkItem[K, T] | object] = asyncio.Queue()
+    pacer = _Pacer(rate)
+
+    alive = max(concurrency, 1)
+
+    async def worker():
+        nonlocal alive
+        try:
+            for target in pending:
+                await pacer.wait(key(target) if key else None)
+                try:
+                    item = BulkItem(target, await func(target))
+                except Exception as e:
+                    item = BulkItem(target, error=e)
+                results.put_nowait(item)
+        finally:
+            alive -= 1
+            if not alive:
+                results.put_nowait(_END)
+
+    workers = [asyncio.create_task(worker()) for _ in range(alive)]
+    try:
+        while (item := await results.get()) is not _END:
+            yield item  # type: ignore
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+
+ChannelTarget = tuple[Account, str]
+
+
+@dataclass
+class BroadcastReport:
+    """广播的汇总结果，键为 (platform, self_id, channel_id)"""
+
+    receipts: dict[tuple[str, str, str], list[MessageObject]] = field(default_factory=dict)
+    failures: dict[tuple[str, str, str], Exception] = field(default_factory=dict)
+
+    @property
+    def succeeded(self) -> int:
+        return len(self.receipts)
+
+    @property
+    def failed(self) -> int:
+        return len(self.failures)
+
+    @property
+    def total(self) -> int:
+        return self.succeeded + self.failed
+
+    def add(self, item: BulkItem[ChannelTarget, list[MessageObject]]):
+        account, channel_id = item.target
+        key = (account.platform, account.self_id, channel_id)
+        if item.error is None:
+            self.receipts[key] = item.result or []
+        else:
+            self.failures[key] = item.error
+
+    def __repr__(self):
+        return f"<BroadcastReport {self.succeeded}/{self.total} succeeded, {self.failed} failed>"
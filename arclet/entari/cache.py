@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any, Generic, TypeVar
+
+from satori.client.account import Account
+from satori.const import EventType
+from satori.model import Channel, Event, Guild, Member, MessageObject, User
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+_MISSING: Any = object()
+
+
+class TTLCache(Generic[K, V]):
+    """带过期时间与容量上限的 LRU 缓存
+
+    `get_or_fetch` 会合并对同一个键的并发请求，只有第一个请求会真正执行获取操作，其余请求等待其结果。
+
+    Args:
+        maxsize: 缓存的最大条目数，为 0 时不缓存
+        ttl: 条目的过期时间（秒），为 0 时不缓存
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._pending: dict[K, asyncio.Future[V]] = {}
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key: K):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def get(self, key: K, default: Any = None) -> V | Any:
+        if (item := self._data.get(key)) is None:
+            return default
+        expire, value = item
+        if expire < time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: K, value: V, ttl: float | None = None):
+        ttl = self.ttl if ttl is None else ttl
+        if self.maxsize <= 0 or ttl <= 0:
+            return
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: K, default: Any = None) -> V | Any:
+        if (item := self._data.pop(key, None)) is None:
+            return default
+        return item[1]
+
+    def clear(self):
+        self._data.clear()
+
+    def evict(self, predicate: Callable[[K], bool]):
+        """移除所有键满足 `predicate` 的条目"""
+        for key in [key for key in self._data if predicate(key)]:
+            del self._data[key]
+
+    def resize(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        while len(self._data) > max(maxsize, 0):
+            self._data.popitem(last=False)
+
+    async def get_or_fetch(self, key: K, fetch: Callable[[], Awaitable[V]]) -> V:
+        """获取缓存的值；若不存在，则调用 `fetch` 获取并缓存"""
+        if (value := self.get(key, _MISSING)) is not _MISSING:
+            self.hits += 1
+            return value
+        if (pending := self._pending.get(key)) is not None:
+            self.hits += 1
+            return await asyncio.shield(pending)
+        self.misses += 1
+        fut: asyncio.Future[V] = asyncio.get_running_loop().create_future()
+        # 没有其他等待者时，避免出现 "Future exception was never retrieved"
+        fut.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._pending[key] = fut
+        try:
+            value = await fetch()
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except Exception as e:
+            fut.set_exception(e)
+            raise
+        else:
+            self.set(key, value)
+            fut.set_result(value)
+            return value
+        finally:
+            del self._pending[key]
+
+
+message_cache: TTLCache[tuple[str, str, str, str], MessageObject] = TTLCache()
+"""消息缓存，键为 (platform, self_id, channel_id, message_id)，用于解析引用消息"""
+
+
+def _complete(
+    message: MessageObject,
+    channel: Channel | None = None,
+    guild: Guild | None = None,
+    member: Member | None = None,
+    user: User | None = None,
+):
+    """补全消息中缺失的来源信息，以便缓存的消息可以替代 `message.get` 的结果"""
+    if (message.user or not user) and (message.channel or not channel):
+        return message
+    obj = MessageObject(
+        message.id,
+        message.content,
+        message.channel or channel,
+        message.guild or guild,
+        message.member or member,
+        message.user or user,
+        message.created_at,
+        message.updated_at,
+        message.referrer,
+    )
+    obj._parsed_message = message._parsed_message
+    return obj
+
+
+def cache_message(account: Account, channel_id: str, message: MessageObject, user: User | None = None):
+    """缓存一条消息
+
+    Args:
+        account: 消息所属的账号
+        channel_id: 消息所在的频道 ID
+        message: 消息对象
+        user: 消息的发送者，用于补全消息对象中缺失的 user 字段
+    """
+    message_cache.set((account.platform, account.self_id, channel_id, message.id), _complete(message, user=user))
+
+
+def record_event(account: Account, event: Event):
+    """根据收到的事件更新消息缓存与实体缓存"""
+    if event.type in _ENTITY_EVENTS:
+        invalidate_entities(account, event)
+        return
+    if not event.message or not event.channel:
+        return
+    if event.type in (EventType.MESSAGE_CREATED, EventType.MESSAGE_UPDATED):
+        message = _complete(event.message, event.channel, event.guild, event.member, event.user)
+        message_cache.set((account.platform, account.self_id, event.channel.id, message.id), message)
+    elif event.type == EventType.MESSAGE_DELETED:
+        message_cache.pop((account.platform, account.self_id, event.channel.id, event.message.id))
+
+
+async def get_message(account: Account, channel_id: str, message_id: str) -> MessageObject:
+    """获取消息，优先使用缓存"""
+    return await message_cache.get_or_fetch(
+        (account.platform, account.self_id, channel_id, message_id),
+        lambda: account.protocol.message_get(channel_id, message_id),
+    )
+
+
+entity_cache: TTLCache[tuple[str, ...], Any] = TTLCache(maxsize=4096, ttl=600)
+"""实体缓存，缓存频道、群组、用户与群成员的信息
+
+键为 (kind, platform, self_id, *ids)，其中 kind 为 `channel`、`guild`、`user` 或 `member`
+"""
+
+_CHANNEL_EVENTS = {EventType.CHANNEL_ADDED, EventType.CHANNEL_UPDATED, EventType.CHANNEL_REMOVED}
+_GUILD_EVENTS = {EventType.GUILD_ADDED, EventType.GUILD_UPDATED, EventType.GUILD_REMOVED}
+_MEMBER_EVENTS = {EventType.GUILD_MEMBER_ADDED, EventType.GUILD_MEMBER_UPDATED, EventType.GUILD_MEMBER_REMOVED}
+_ROLE_EVENTS = {EventType.GUILD_ROLE_CREATED, EventType.GUILD_ROLE_UPDATED, EventType.GUILD_ROLE_DELETED}
+_ENTITY_EVENTS = _CHANNEL_EVENTS | _GUILD_EVENTS | _MEMBER_EVENTS | _ROLE_EVENTS | {EventType.LOGIN_UPDATED}
+
+
+def forget_channel(account: Account, channel_id: str):
+    entity_cache.pop(("channel", account.platform, account.self_id, channel_id))
+
+
+def forget_guild(account: Account, guild_id: str):
+    """移除群组及其下所有成员的缓存"""
+    entity_cache.pop(("guild", account.platform, account.self_id, guild_id))
+    forget_member(account, guild_id)
+
+
+def forget_member(account: Account, guild_id: str, user_id: str | None = None):
+    """移除群成员的缓存，未指定 `user_id` 时移除该群组下的所有成员"""
+    if user_id is not None:
+        entity_cache.pop(("member", account.platform, account.self_id, guild_id, user_id))
+        return
+    entity_cache.evict(lambda key: key[0] == "member" and key[1:4] == (account.platform, account.self_id, guild_id))
+
+
+def forget_user(account: Account, user_id: str):
+    entity_cache.pop(("user", account.platform, account.self_id, user_id))
+
+
+def invalidate_entities(account: Account, event: Event):
+    """根据实体变更事件移除对应的实体缓存"""
+    if event.type in _CHANNEL_EVENTS:
+        if event.channel:
+            forget_channel(account, event.channel.id)
+    elif event.type in _GUILD_EVENTS:
+        if event.guild:
+            forget_guild(account, event.guild.id)
+    elif event.type in _MEMBER_EVENTS:
+        if event.guild:
+            forget_member(account, event.guild.id, event.user.id if event.user else None)
+        if event.user:
+            forget_user(account, event.user.id)
+    elif event.type in _ROLE_EVENTS:
+        # 角色变更会影响该群组下成员的角色信息
+        if event.guild:
+            forget_member(account, event.guild.id)
+    elif event.type == EventType.LOGIN_UPDATED:
+        forget_user(account, account.self_id)
+
+
+async def get_channel(account: Account, channel_id: str) -> Channel:
+    """获取频道，优先使用缓存"""
+    return await entity_cache.get_or_fetch(
+        ("channel", account.platform, account.self_id, channel_id),
+        lambda: account.protocol.channel_get(channel_id),
+    )
+
+
+async def get_guild(account: Account, guild_id: str) -> Guild:
+    """获取群组，优先使用缓存"""
+    return await entity_cache.get_or_fetch(
+        ("guild", account.platform, account.self_id, guild_id),
+        lambda: account.protocol.guild_get(guild_id),
+    )
+
+
+async def get_user(account: Account, user_id: str) -> User:
+    """获取用户，优先使用缓存"""
+    return await entity_cache.get_or_fetch(
+        ("user", account.platform, account.self_id, user_id),
+        lambda: account.protocol.user_get(user_id),
+    )
+
+
+async def get_member(account: Account, guild_id: str, user_id: str) -> Member:
+    """获取群成员，优先使用缓存"""
+    return await entity_cache.get_or_fetch(
+        ("member", account.platform, account.self_id, guild_id, user_id),
+        lambda: account.protocol.guild_member_get(guild_id, user_id),
+    )
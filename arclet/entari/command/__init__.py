@@ -9,15 +9,14 @@ import arclet.letoderea as le
 from arclet.alconna import Alconna, Arg, Args, Arparma, CommandMeta, command_manager
 from arclet.alconna.tools.construct import AlconnaString, alconna_from_format
 from arclet.alconna.typing import TAValue
-from arclet.letoderea import EVENT, RESULT, Contexts, ExitState, Scope, Subscriber, make_event
+from arclet.letoderea import Contexts, ExitState, Scope, Subscriber, make_event
 from arclet.letoderea import on as listen
 from arclet.letoderea.provider import TProviders, get_providers
-from arclet.letoderea.utils import Result
 from nepattern import DirectPattern
 from tarina import LRU
-from tarina.trie import CharTrie
 
 from ..config import BasicConfModel, config_model_validate, model_field
+from ..context import OverlayContexts
 from ..event.base import MessageCreatedEvent
 from ..event.command import CommandExecute, CommandParse
 from ..event.config import ConfigReload
@@ -26,13 +25,14 @@ from ..message import MessageChain
 from ..plugin import PluginRole, RootlessPlugin, get_plugin, metadata, plugin_config
 from ..session import Session
 from .argv import MessageArgv  # noqa: F401
+from .argv import token_cache as token_cache
+from .index import command_index
 from .model import CommandResult, Match, Query
-from .plugin import mount
+from .plugin import _after_execute, mount
 from .provider import AlconnaProviderFactory, AlconnaSuppiler, MessageJudges
 
 _BaseM: TypeAlias = str | MessageChain | None
 _M: TypeAlias = _BaseM | Generator[_BaseM, None, None] | AsyncGenerator[_BaseM, None] | Awaitable[_BaseM]
-_RM: TypeAlias = _BaseM | AsyncGenerator[_BaseM, None]
 TM = TypeVar("TM", bound=_M)
 
 
@@ -47,21 +47,6 @@ class CommandDispatch:
     providers = [*get_providers(MessageCreatedEvent), *get_providers(CommandExecute), AlconnaProviderFactory()]
 
 
-async def _after_execute(ctx: Contexts, session: Session | None = None):
-    result: _RM = ctx[RESULT]
-    event = ctx[EVENT]
-    if result is not None:
-        if isinstance(result, AsyncGenerator):
-            msg = None
-            async for msg in result:
-                if not isinstance(event, CommandExecute) and session and msg is not None:
-                    await session.send(msg)
-            return Result(msg)
-        if not isinstance(event, CommandExecute) and session:
-            await session.send(result)
-        return Result(result)
-
-
 class EntariCommands:
 
     def __init__(
@@ -72,7 +57,7 @@ class EntariCommands:
         use_config_prefix: bool = True,
         ignore_prefix_filter: str | None = None,
     ):
-        self.trie: CharTrie[list[str]] = CharTrie()
+        self.index = command_index
         self.scope = Scope("entari.command")
         self.block = block
         self.judge = MessageJudges(need_notice_me, need_reply_me, use_config_prefix, ignore_prefix_filter)  # noqa: E501
@@ -81,6 +66,10 @@ class EntariCommands:
 
         le.on(CommandExecute, self.execute)
 
+    @property
+    def trie(self):
+        return self.index.trie
+
     @property
     def all_helps(self) -> str:
         return command_manager.all_command_help()
@@ -92,15 +81,14 @@ class EntariCommands:
         msg = str(message).lstrip()
         if not msg:
             return
-        subs = self.subscribers
-        if matches := list(self.trie.prefixes(msg)):
-            subs = {
-                sub_id: self.subscribers[sub_id]
-                for res in matches
-                for sub_id in res.value
-                if sub_id in self.subscribers and self.subscribers[sub_id].available
-            }
-        results = await asyncio.gather(*(sub.handle(ctx.copy(), inner=True) for sub in subs.values()))
+        subs = [
+            sub
+            for sub_id in self.index.route(msg)
+            if (sub := self.subscribers.get(sub_id)) is not None and sub.available
+        ]
+        if not subs:
+            return
+        results = await asyncio.gather(*(sub.handle(OverlayContexts(ctx), inner=True) for sub in subs))
         for result in results:
             if result is ExitState.stop:
                 continue
@@ -162,31 +150,19 @@ class EntariCommands:
                     target = wpr(func)
                 target.propagate(AlconnaSuppiler(_command, self._cache.setdefault(_command._hash, LRU(10)), self.block))
                 target.propagate(_after_execute, priority=0)
-                self.trie.setdefault(key, []).append(target.id)
+                keys = None if "{" in key or _command.meta.fuzzy_match else [key]
+                unindex = self.index.add(target.id, _command, keys)
                 self.subscribers[target.id] = target
 
                 def _remove(_):
                     command_manager.delete(get_cmd(_))
-                    self.trie[key].remove(target.id)  # type: ignore
-                    if not self.trie[key]:
-                        self.trie.pop(key, None)  # type: ignore
+                    unindex()
                     self.subscribers.pop(target.id, None)
 
                 target._attach_disposes(_remove)
                 return target
 
             _command = cast(Alconna, cmd)
-            if not isinstance(cmd.command, str):
-                raise TypeError("Command name must be a string.")
-            keys = []
-            if not _command.prefixes:
-                keys.append(_command.command)
-            elif not all(isinstance(i, str) for i in _command.prefixes):
-                raise TypeError("Command prefixes must be a list of string.")
-            else:
-                for prefix in cast(list[str], _command.prefixes):
-                    keys.append(prefix + _command.command)
-
             if plg:
                 wpr = plg.dispatch(CommandDispatch).handle(providers=providers)
                 wpr._depth += 1 + getattr(wrapper, "_depth", 0)
@@ -199,16 +175,12 @@ class EntariCommands:
             target.propagate(AlconnaSuppiler(_command, self._cache.setdefault(_command._hash, LRU(10)), self.block))
             target.propagate(_after_execute, priority=0)
             self.subscribers[target.id] = target
-            for _key in keys:
-                self.trie.setdefault(_key, []).append(target.id)
+            unindex = self.index.add(target.id, _command)
 
             def _remove(_):
                 command_manager.delete(get_cmd(_))
                 self.subscribers.pop(target.id, None)
-                for _key in keys:
-                    self.trie[_key].remove(target.id)  # type: ignore
-                    if not self.trie[_key]:
-                        self.trie.pop(_key, None)  # type: ignore
+                unindex()
 
             target._attach_disposes(_remove)
             return target
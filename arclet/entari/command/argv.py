@@ -1,14 +1,152 @@
-from arclet.alconna import Argv, argv_config, set_default_argv_type, set_namespace_argv_type
+from __future__ import annotations
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+from arclet.alconna import Argv, CommandMeta, argv_config, set_default_argv_type, set_namespace_argv_type
 from satori import Text
+from tarina import LRU
 
 from ..message import MessageChain
 
 
+class Tokens:
+    """一次分词 (`Argv.build`) 的结果"""
+
+    __slots__ = ("raw", "ndata", "token", "elements")
+
+    def __init__(self, raw: tuple, ndata: int, token: int, elements: list):
+        self.raw = raw
+        self.ndata = ndata
+        self.token = token
+        self.elements = elements
+        """分词的原消息中的元素，使按元素 id 建立的键在缓存的生命周期内保持有效"""
+
+
+class TokenCache:
+    """命令分词缓存
+
+    同一条消息往往会交给多个候选命令解析，而配置相同的 `Argv` 对同一条消息的分词结果也相同：
+
+    - 事件级缓存存放于事件上，同一事件的所有候选命令共用，按消息元素的 id 索引；
+    - 全局缓存是容量有限的 LRU，只存放纯文本消息的分词结果，按文本索引，用于应对重复的相同命令 (如刷屏的 `help`)。
+
+    Args:
+        maxsize: 全局缓存的最大条目数，为 0 时不启用全局缓存
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self.global_: LRU[tuple, Tokens] = LRU(max(maxsize, 1))
+        self.event_hits = 0
+        self.global_hits = 0
+        self.misses = 0
+        self._current: ContextVar[dict | None] = ContextVar("entari_command_tokens", default=None)
+
+    @property
+    def hits(self) -> int:
+        return self.event_hits + self.global_hits
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "event_hits": self.event_hits,
+            "global_hits": self.global_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hit_rate, 4),
+            "global_size": len(self.global_),
+        }
+
+    @contextmanager
+    def scope(self, event_cache: dict | None) -> Iterator[None]:
+        """在该范围内，`MessageArgv.build` 使用事件级缓存 (`event_cache` 为事件的缓存字典) 与全局缓存"""
+        token = self._current.set(event_cache.setdefault("$command_tokens", {}) if event_cache is not None else {})
+        try:
+            yield
+        finally:
+            self._current.reset(token)
+
+    def lookup(self, sig: tuple, data: MessageChain) -> tuple[Tokens | None, tuple | None, tuple | None]:
+        """返回缓存的分词结果，以及未命中时用于存放结果的事件级与全局键"""
+        if (store := self._current.get()) is None:
+            return None, None, None
+        event_key = (sig, *map(id, data))
+        if (tokens := store.get(event_key)) is not None:
+            self.event_hits += 1
+            return tokens, None, None
+        global_key = None
+        if self.maxsize > 0 and all(elem.__class__ is Text for elem in data):
+            global_key = (sig, *(elem.text for elem in data))  # type: ignore
+            if (tokens := self.global_.get(global_key)) is not None:
+                self.global_hits += 1
+                store[event_key] = tokens
+                return tokens, None, None
+        self.misses += 1
+        return None, event_key, global_key
+
+    def store(self, event_key: tuple, global_key: tuple | None, tokens: Tokens):
+        if (store := self._current.get()) is not None:
+            store[event_key] = tokens
+        if global_key is not None:
+            self.global_[global_key] = tokens
+
+
+token_cache = TokenCache()
+"""全局命令分词缓存"""
+
+
 class MessageArgv(Argv[MessageChain]):
+    _token_sig: tuple
+
     @staticmethod
     def generate_token(data: list) -> int:
         return hash("".join(i.__repr__() for i in data))
 
+    def __post_init__(self, meta: CommandMeta):
+        super().__post_init__(meta)
+        self._update_token_sig()
+
+    def compile(self, meta: CommandMeta):
+        super().compile(meta)
+        self._update_token_sig()
+
+    def _update_token_sig(self):
+        # 分词结果取决于以下配置；它们只在构造与 `compile` 时改变，因此签名在此时计算一次
+        self._token_sig = (
+            self.__class__,
+            self.to_text,
+            self.checker,
+            self.converter,
+            self.message_cache,
+            *self.filter_out,
+            *self.preprocessors.items(),
+        )
+
+    def build(self, data: MessageChain):
+        if data.__class__ is not MessageChain or (self.checker and not self.checker(data)):
+            return super().build(data)
+        tokens, event_key, global_key = token_cache.lookup(self._token_sig, data)
+        if tokens is None:
+            super().build(data)
+            if event_key is not None:
+                token_cache.store(
+                    event_key, global_key, Tokens(tuple(self.raw_data), self.ndata, self.token, list(data))
+                )
+            return self
+        self.reset()
+        self.origin = data
+        self.raw_data = list(tokens.raw)
+        self.bak_data = list(tokens.raw)
+        self.ndata = tokens.ndata
+        self.token = tokens.token
+        return self
+
 
 set_default_argv_type(MessageArgv)
 set_namespace_argv_type("Entari", MessageArgv)
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable
+
+from arclet.alconna import Alconna, command_manager
+from tarina.trie import CharTrie
+
+
+def command_keys(cmd: Alconna) -> list[str] | None:
+    """计算命令在前缀树中的键
+
+    命令名与前缀均为不含占位符的字符串时，返回所有 `前缀 + 命令名` 的组合；
+    否则 (例如命令名为元素类型、前缀包含非字符串对象或命令名中带有 `{...}` 占位符) 返回 None，
+    表示该命令无法通过前缀精确路由。
+
+    启用了模糊匹配 (`CommandMeta.fuzzy_match`) 的命令同样返回 None，
+    因为命令名拼写错误的消息也需要交给它，才能给出 "您是否想要..." 的提示。
+    """
+    if not isinstance(cmd.command, str) or "{" in cmd.command or cmd.meta.fuzzy_match:
+        return None
+    if not cmd.prefixes:
+        return [cmd.command]
+    if not all(isinstance(prefix, str) for prefix in cmd.prefixes):
+        return None
+    return [prefix + cmd.command for prefix in cmd.prefixes]  # type: ignore
+
+
+def _shortcut_store() -> dict[str, tuple[dict, dict]]:
+    # 快捷命令可在运行时任意添加，其触发文本与命令前缀无关；
+    # command_manager 只提供按命令查询快捷命令的接口，没有公开快捷命令的整体列表，
+    # 逐个命令查询又会让路由开销重新与命令总数相关，因此这里读取其内部的存储 (键为 `namespace.name`)
+    try:
+        return command_manager._CommandManager__shortcuts  # type: ignore[attr-defined]
+    except AttributeError:
+        raise RuntimeError(
+            "the installed arclet-alconna no longer provides `CommandManager.__shortcuts`, "
+            "shortcut routing of entari commands is unavailable"
+        ) from None
+
+
+_shortcut_store()  # 在导入时检查，避免快捷命令在路由中悄无声息地失效
+
+
+def _shortcut_paths() -> Iterable[str]:
+    return (path for path, (_, keys) in _shortcut_store().items() if keys)
+
+
+class CommandIndex:
+    """命令路由索引
+
+    - 可以精确路由的命令登记在前缀树中，消息只会被分发给键为其前缀的命令；
+    - 其余命令登记在回退列表中，每条消息都会分发给它们；
+    - 拥有快捷命令的命令同样每条消息都会分发。
+
+    因此非命令消息的路由开销只与消息长度以及回退列表的长度相关，而与已注册的命令总数无关。
+    """
+
+    def __init__(self):
+        self.trie: CharTrie[list[str]] = CharTrie()
+        self.fallback: dict[str, None] = {}
+        self.paths: dict[str, list[str]] = {}
+
+    def add(self, target: str, cmd: Alconna, keys: list[str] | None = None) -> Callable[[], None]:
+        """登记命令，返回用于移除该登记的函数
+
+        Args:
+            target: 订阅者 ID
+            cmd: 命令
+            keys: 命令在前缀树中的键，默认由 `command_keys` 计算
+        """
+        keys = command_keys(cmd) if keys is None else keys
+        namespace, name = command_manager._command_part(cmd.path)
+        path = f"{namespace}.{name}"
+        self.paths.setdefault(path, []).append(target)
+        if keys is None:
+            self.fallback[target] = None
+        else:
+            for key in keys:
+                self.trie.setdefault(key, []).append(target)
+
+        def remove():
+            if (ids := self.paths.get(path)) and target in ids:
+                ids.remove(target)
+                if not ids:
+                    del self.paths[path]
+            if keys is None:
+                self.fallback.pop(target, None)
+                return
+            for key in keys:
+                if key in self.trie and target in (ids := self.trie[key]):
+                    ids.remove(target)
+                    if not ids:
+                        self.trie.pop(key, None)  # type: ignore
+
+        return remove
+
+    def route(self, *msgs: str) -> dict[str, None]:
+        """返回可能匹配这些消息文本之一的订阅者 ID (保持登记顺序且不重复)"""
+        result: dict[str, None] = {}
+        for msg in msgs:
+            for res in self.trie.prefixes(msg):
+                result.update(dict.fromkeys(res.value))
+        result.update(self.fallback)
+        for path in _shortcut_paths():
+            if ids := self.paths.get(path):
+                result.update(dict.fromkeys(ids))
+        return result
+
+
+command_index = CommandIndex()
+"""`command.on` 与 `command.mount` 共用的命令路由索引"""
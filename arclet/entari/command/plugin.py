@@ -1,22 +1,26 @@
 from __future__ import annotations
 
+import asyncio
+from collections.abc import AsyncGenerator
 from typing import Any
 from typing_extensions import TypeVar, deprecated
 
 from arclet.alconna import Alconna, command_manager
-from arclet.letoderea import EVENT, RESULT, Contexts, Result, Subscriber, define, deref, use
+from arclet.letoderea import EVENT, RESULT, STOP, Contexts, Propagator, Result, Subscriber, define, deref, use
 from arclet.letoderea.exceptions import _ExitException
 from arclet.letoderea.provider import TProviders
 from arclet.letoderea.scope import SubscriberSlot
 from tarina import LRU
 
-from ..event.base import MessageCreatedEvent
+from ..event.base import MessageCreatedEvent, _is_notice_me, _remove_notice_me
 from ..event.command import CommandExecute, CommandOutput
 from ..message import MessageChain
+from ..outbound import outbound
 from ..plugin.model import Plugin, PluginDispatcher
 from ..session import Session
+from .index import command_index
 from .model import Match, Query
-from .provider import AlconnaProviderFactory, AlconnaSuppiler, Assign, MessageJudges, _seminal
+from .provider import AlconnaProviderFactory, AlconnaSuppiler, Assign, MessageJudges, _seminal, command_texts
 
 exec_pub = define(CommandExecute)
 exec_provider = CommandExecute.providers[0]
@@ -37,11 +41,49 @@ async def _after_execute(ctx: Contexts, session: Session | None = None):
                 if not isinstance(event, CommandExecute) and session:
                     await session.send(msg)
             return result
+        if isinstance(result, AsyncGenerator):
+            msg = None
+            # 启用出站队列时不逐条等待发送，以便队列合并连续的消息
+            sending = []
+            async for msg in result:
+                if not isinstance(event, CommandExecute) and session and msg is not None:
+                    if outbound.enabled:
+                        sending.append(asyncio.create_task(session.send(msg)))
+                    else:
+                        await session.send(msg)
+            if sending:
+                await asyncio.gather(*sending)
+            return Result(msg)
         if not isinstance(event, CommandExecute) and session:
             await session.send(result)
         return Result(result)
 
 
+def command_routes(event: MessageCreatedEvent) -> dict[str, None]:
+    """计算可能匹配该消息的命令，结果缓存在事件上，供所有挂载的命令共用"""
+    if (routes := event._cache.get("$command_routes")) is None:
+        content = event.content
+        if _is_notice_me(content, event.account):
+            content = _remove_notice_me(content, event.account)
+        routes = event._cache["$command_routes"] = command_index.route(*command_texts(content))
+    return routes
+
+
+class _MountRoute(Propagator):
+    """只有路由索引认为可能匹配的消息才会交给挂载的命令继续判断与解析"""
+
+    def __init__(self, target: str):
+        self.target = target
+
+    def check(self, ctx: Contexts):
+        # 经由 `as_execute` 登记到 CommandExecute 上的订阅者不参与路由
+        if isinstance(event := ctx[EVENT], MessageCreatedEvent) and self.target not in command_routes(event):
+            return STOP
+
+    def compose(self):
+        yield self.check, True, 0
+
+
 class _ExecuteDispatcher(PluginDispatcher[str | MessageChain]):
     def __init__(self, plugin: Plugin, supplier: AlconnaSuppiler):
         super().__init__(plugin, CommandExecute)
@@ -58,7 +100,10 @@ class AlconnaPluginDispatcher(PluginDispatcher[T]):
         self.cache = LRU(10)
         self.supplier = AlconnaSuppiler(command, self.cache, block, skip_for_unmatch)
         super().__init__(plugin, MessageCreatedEvent, command.path)
+        route = _MountRoute(f"entari.command/mount/{command.path}#{id(self)}")
         plugin.collect(
+            command_index.add(route.target, command),
+            self.propagators.append(route),
             self.propagators.append(
                 MessageJudges(need_reply_me, need_notice_me, use_config_prefix, None),
             ),
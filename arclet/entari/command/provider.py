@@ -6,7 +6,7 @@ from typing import Any, Literal, Union, get_args
 from arclet.alconna import Alconna, Arparma, Duplication, Empty, output_manager
 from arclet.alconna.builtin import generate_duplication
 from arclet.alconna.exceptions import SpecialOptionTriggered
-from arclet.letoderea import BLOCK, STOP, Contexts, Param, Propagator, Provider, post
+from arclet.letoderea import BLOCK, EVENT, STOP, Contexts, Param, Propagator, Provider, post
 from arclet.letoderea.exceptions import ProviderUnsatisfied
 from arclet.letoderea.provider import ProviderFactory
 from nepattern.util import CUnionType
@@ -14,14 +14,17 @@ from satori import ChannelType, MessageObject
 from satori.element import Text
 from tarina import LRU
 from tarina.generic import generic_isinstance, get_origin, origin_is_union
+from tarina.trie import CharTrie
 
 from ..config import EntariConfig
-from ..const import ITEM_MESSAGE_CONTENT
+from ..const import ITEM_COMMAND_PREFIX, ITEM_MESSAGE_CONTENT
 from ..event.base import Reply
 from ..event.command import CommandOutput, CommandParse, CommandReceive
+from ..event.subscription import has_subscribers
 from ..filter.parse import parse_filter
 from ..message import MessageChain
 from ..session import Session
+from .argv import token_cache
 from .model import CommandResult, Match, Query
 
 
@@ -37,29 +40,117 @@ def _is_optional(annotation: Any) -> bool:
     return False
 
 
+class PrefixMatcher:
+    """由配置的命令前缀与昵称预先构建的匹配器
+
+    前缀登记在前缀树中，一次查找即可得到文本的所有匹配前缀，再按配置中的顺序取第一个；昵称的正则只编译一次。
+    """
+
+    def __init__(self, prefixes: list[str], nickname: str):
+        self.key = (tuple(prefixes), nickname)
+        self.enabled = bool(prefixes or nickname)
+        self.nickname = re.compile(rf"^@?{re.escape(nickname)}[，,:\s]+") if nickname else None
+        self.has_prefix = bool(prefixes)
+        self.empty_index = prefixes.index("") if "" in prefixes else len(prefixes)
+        self.trie: CharTrie[int] = CharTrie()
+        for index, prefix in enumerate(prefixes):
+            if prefix and prefix not in self.trie:
+                self.trie[prefix] = index
+
+    def strip_text(self, text: str) -> str | None:
+        """去除文本开头的昵称或命令前缀，无需去除时返回原文本，未匹配时返回 None"""
+        stripped = text.lstrip()
+        if self.nickname and (mat := self.nickname.match(stripped)):
+            return stripped[mat.end() :]
+        if not self.has_prefix:
+            return text
+        index, length = self.empty_index, 0
+        for res in self.trie.prefixes(stripped):
+            if res.value < index:
+                index, length = res.value, len(res.key)
+        if index < self.empty_index:
+            return stripped[length:]
+        return text if self.empty_index < len(self.key[0]) else None
+
+    def strip(self, message: MessageChain) -> "PrefixResult":
+        """对消息去除昵称或命令前缀，结果中的消息总是原消息的副本"""
+        if not self.enabled:
+            return PrefixResult(message.fork(), False)
+        if not message or not isinstance(message[0], Text):
+            return PrefixResult(None, False)
+        text = message[0].text
+        result = message.fork()
+        if (stripped := self.strip_text(text)) is None:
+            return PrefixResult(result, True)
+        if stripped != text:
+            result[0] = Text(stripped)
+        return PrefixResult(result, False)
+
+
+class PrefixResult:
+    """一次事件中去除昵称或命令前缀的结果，由该事件的所有 `MessageJudges` 共用
+
+    Attributes:
+        message: 去除前缀后的消息，为 None 表示任何情况下都不应继续处理
+        need_skip: 是否未匹配到前缀，此时只有忽略前缀的条件成立才能继续处理 (使用原消息)
+    """
+
+    __slots__ = ("message", "need_skip", "skips")
+
+    def __init__(self, message: MessageChain | None, need_skip: bool):
+        self.message = message
+        self.need_skip = need_skip
+        self.skips: dict[Any, bool] = {}
+
+
+_matcher: PrefixMatcher | None = None
+
+
+def prefix_matcher() -> PrefixMatcher:
+    """当前配置下的前缀匹配器，配置变化时重新构建"""
+    global _matcher
+
+    basic = EntariConfig.instance.basic
+    if _matcher is None or _matcher.key != (tuple(basic.prefix), basic.nickname):
+        _matcher = PrefixMatcher(basic.prefix, basic.nickname)
+    return _matcher
+
+
 def _remove_config_prefix(message: MessageChain, allow_skip: bool = False) -> MessageChain:
-    command_prefix = EntariConfig.instance.basic.prefix
-    nickname = EntariConfig.instance.basic.nickname
-    if not command_prefix and not nickname:
-        return message
-    if message and isinstance(message[0], Text):
-        text = message[0].text.lstrip()
-        if nickname:
-            if mat := re.match(rf"^@?{re.escape(nickname)}[，,:\s]+", text):
-                text = text[mat.end() :]
-                message[0] = Text(text)
-                return message
-        if not command_prefix:
-            return message
-        for prefix in command_prefix:
-            if not prefix:
-                return message
-            if text.startswith(prefix):
-                message[0] = Text(text[len(prefix) :])
-                return message
-        if allow_skip:
-            return message
-    return MessageChain()
+    res = prefix_matcher().strip(message)
+    if res.message is None or (res.need_skip and not allow_skip):
+        return MessageChain()
+    return res.message
+
+
+def command_texts(message: MessageChain) -> list[str]:
+    """列出消息可能交给命令解析的文本 (原文本，以及去除配置的昵称或命令前缀后的文本)
+
+    用于在解析之前通过命令路由索引筛选可能匹配的命令。
+    """
+    text = str(message).lstrip()
+    if not EntariConfig._inited:
+        return [text]
+    if (stripped := prefix_matcher().strip_text(text)) is None or stripped == text:
+        return [text]
+    return [text, stripped]
+
+
+def _prefix_result(ctx: Contexts, message: MessageChain) -> PrefixResult:
+    # 同一事件的所有 judge 共用一次去除前缀的结果：结果缓存在事件上，并写入各自的上下文
+    if (res := ctx.get(ITEM_COMMAND_PREFIX)) is not None:
+        return res
+    cache: dict | None = getattr(ctx.get(EVENT), "_cache", None)
+    if cache is None or (res := cache.get(ITEM_COMMAND_PREFIX)) is None:
+        res = prefix_matcher().strip(message)
+        if cache is not None:
+            cache[ITEM_COMMAND_PREFIX] = res
+    ctx[ITEM_COMMAND_PREFIX] = res
+    return res
+
+
+async def _direct_checker(session: Session, *_):
+    return session.channel.type is ChannelType.DIRECT
 
 
 # fmt: off
@@ -75,22 +166,28 @@ class MessageJudges(Propagator):
     def _checker(self, ignore_prefix_filter: str | None):
         if ignore_prefix_filter:
             return parse_filter(ignore_prefix_filter)
-        else:
-            async def checker(session: Session, *_): return session.channel.type is ChannelType.DIRECT
-            return checker
+        return _direct_checker
 
     async def judge(self, ctx: Contexts, message: MessageChain, is_reply_me: bool = False, is_notice_me: bool = False, session: Session | None = None, in_execute: bool = False):  # noqa: E501
         if not in_execute:
-            message = message.fork()
             if self.need_reply_me and not is_reply_me:
                 return STOP
             if self.need_notice_me and not is_notice_me:
                 return STOP
-            skip = False
-            if session:
-                skip = await self.ignore_prefix_checker(session, is_reply_me, is_notice_me)
-            if self.use_config_prefix and not (message := _remove_config_prefix(message, skip)):
-                return STOP
+            if not self.use_config_prefix:
+                message = message.fork()
+            else:
+                res = _prefix_result(ctx, message)
+                if res.message is None:
+                    return STOP
+                if res.need_skip:
+                    if not session:
+                        return STOP
+                    if (skip := res.skips.get(self.ignore_prefix_checker)) is None:
+                        skip = res.skips[self.ignore_prefix_checker] = bool(await self.ignore_prefix_checker(session, is_reply_me, is_notice_me))  # noqa: E501
+                    if not skip:
+                        return STOP
+                message = res.message.fork()
         if ITEM_MESSAGE_CONTENT in ctx:
             return {ITEM_MESSAGE_CONTENT: message}
         return {"$message": message}
@@ -113,6 +210,7 @@ class AlconnaSuppiler(Propagator):
 
     async def supply(
         self,
+        ctx: Contexts,
         message: MessageChain,
         origin: MessageObject | None = None,
         session: Session | None = None,
@@ -131,13 +229,14 @@ class AlconnaSuppiler(Propagator):
 
         fut = asyncio.Future()
         self.cache[source] = fut
-        if session:
-            recv = await post(ev := CommandReceive(session, self.cmd, message, reply))
+        if session and has_subscribers(ev := CommandReceive(session, self.cmd, message, reply)):
+            recv = await post(ev)
             message = recv.value if recv else ev.content
         with output_manager.capture(self.cmd.name) as cap:
             output_manager.set_action(lambda x: x, self.cmd.name)
             try:
-                _res = self.cmd.parse(message)
+                with token_cache.scope(getattr(ctx.get(EVENT), "_cache", None)):
+                    _res = self.cmd.parse(message)
             except Exception as e:
                 _res = Arparma(self.cmd._hash, message, False, error_info=e)
             may_help_text: str | None = cap.get("output", None)
@@ -149,8 +248,8 @@ class AlconnaSuppiler(Propagator):
             return BLOCK if self.block else STOP
         if not may_help_text and _res.error_info:
             may_help_text = repr(_res.error_info)
-        if session:
-            pres = await post(ev := CommandParse(session, self.cmd, _res))
+        if session and has_subscribers(ev := CommandParse(session, self.cmd, _res)):
+            pres = await post(ev)
             _res = ev.result
             if pres:
                 if isinstance(pres.value, Arparma):
@@ -161,7 +260,8 @@ class AlconnaSuppiler(Propagator):
             res = CommandResult(self.cmd, _res, may_help_text)
         elif session:
             _t = str(_res.error_info) if isinstance(_res.error_info, SpecialOptionTriggered) else "error"
-            ores = await post(ev := CommandOutput(session, self.cmd, _t, may_help_text))
+            ev = CommandOutput(session, self.cmd, _t, may_help_text)
+            ores = await post(ev) if has_subscribers(ev) else None
             msg = MessageChain(ev.content)
             if ores:
                 if ores.value is False:
@@ -82,13 +82,100 @@ class LogInfo(BasicConfModel):
     short_level: bool = model_field(default=False, description="是否在日志中使用简短的级别名称（如 'I' 代替 'INFO'）")
 
 
+class CacheInfo(BasicConfModel):
+    """缓存相关配置"""
+
+    message_size: int = model_field(default=1024, description="消息缓存的最大条目数，用于解析引用消息，为 0 时不缓存")
+    message_ttl: float = model_field(default=300, description="消息缓存的过期时间（秒），为 0 时不缓存")
+    entity_size: int = model_field(default=4096, description="实体 (频道、群组、用户与群成员) 缓存的最大条目数")
+    entity_ttl: float = model_field(default=600, description="实体缓存的过期时间（秒），为 0 时不缓存")
+    upload: bool = model_field(
+        default=False, description="是否按内容哈希缓存上传的文件，并在发送前上传消息中的本地资源"
+    )
+    upload_ttl: float = model_field(default=86400, description="上传缓存的有效期（秒）")
+
+
+class IgnoreInfo(BasicConfModel):
+    """事件过滤相关配置，命中的事件会在解析之前被丢弃"""
+
+    platforms: list[str] = model_field(default_factory=list, description="禁用的平台列表，来自这些平台的事件将被忽略")
+    guilds: list[str] = model_field(default_factory=list, description="屏蔽的群组 ID 列表")
+    channels: list[str] = model_field(default_factory=list, description="屏蔽的频道 ID 列表")
+    users: list[str] = model_field(default_factory=list, description="屏蔽的用户 ID 列表")
+
+
+class IngressInfo(BasicConfModel):
+    """事件入口队列相关配置"""
+
+    workers: int = model_field(
+        default=0,
+        description="处理事件的 worker 数量，为 0 时不启用队列，事件在接收处直接处理",
+    )
+    queue_size: int = model_field(default=1024, description="事件队列的最大长度，为 0 时不限制长度")
+    overflow: Literal["block", "drop_new", "drop_oldest"] = model_field(
+        default="block",
+        description="队列已满时的处理策略：'block' 等待队列空出，'drop_new' 丢弃新事件，'drop_oldest' 丢弃最早的事件",
+    )
+    ordered: bool = model_field(
+        default=False,
+        description="是否按频道（私聊时按用户）保序处理事件：同一频道内的事件依次处理，不同频道的事件并行处理",
+    )
+    lanes: dict[str, Literal["high", "normal", "low"]] = model_field(
+        default_factory=lambda: {
+            "guild-member-updated": "low",
+            "reaction-added": "low",
+            "reaction-removed": "low",
+            "login-updated": "low",
+        },
+        description="事件优先级通道，键为事件类型（如 'reaction-added'）或事件类名（如 'ReactionAddedEvent'），未列出的事件属于 'normal' 通道",  # noqa: E501
+    )
+    shed_latency: float = model_field(
+        default=0,
+        description="低优先级通道的排队延迟阈值（秒），超过后按 shed_policy 处理其中的事件，为 0 时不启用",
+    )
+    shed_policy: Literal["drop", "coalesce"] = model_field(
+        default="drop",
+        description="低优先级通道超过延迟阈值时的处理策略：'drop' 丢弃超时的事件，'coalesce' 合并同一对象上未处理的同类事件",  # noqa: E501
+    )
+
+
+class OutboundInfo(BasicConfModel):
+    """出站消息队列相关配置"""
+
+    rate: float = model_field(default=0, description="每个频道每秒最多发送的消息数，为 0 时不限制")
+    coalesce_window: float = model_field(
+        default=0,
+        description="消息合并窗口（秒），窗口内同一频道连续发送的消息会合并为一条发送，为 0 时不合并",
+    )
+
+
+class GovernorInfo(BasicConfModel):
+    """API 调用治理相关配置"""
+
+    enabled: bool = model_field(
+        default=False,
+        description="是否启用 API 调用治理（限流学习、只读 API 的重试与按账号熔断），默认关闭，关闭时直接调用 API",
+    )
+    max_retries: int = model_field(default=2, description="只读 API（*.get, *.list）失败时的最大重试次数")
+    backoff: float = model_field(default=0.5, description="重试的基础退避时间（秒），每次重试翻倍")
+    failure_threshold: int = model_field(
+        default=5, description="同一账号连续失败多少次后打开熔断器，打开期间的调用直接失败，为 0 时不熔断"
+    )
+    cooldown: float = model_field(default=30, description="熔断器打开后的冷却时间（秒），结束后放行一次试探调用")
+
+
 class BasicConfig(BasicConfModel):
     """Entari 应用的基础配置"""
 
     network: list[WebsocketsInfo | WebhookInfo] = model_field(default_factory=list, description="网络相关配置")
     ignore_self_message: bool = model_field(default=True, description="是否忽略自己发送的消息事件")
+    ignore: IgnoreInfo = model_field(default_factory=IgnoreInfo, description="事件过滤相关配置")
     skip_req_missing: bool = model_field(default=False, description="是否跳过无法执行的事件监听器")
     log: LogInfo = model_field(default_factory=LogInfo, description="日志相关配置")
+    ingress: IngressInfo = model_field(default_factory=IngressInfo, description="事件入口队列相关配置")
+    outbound: OutboundInfo = model_field(default_factory=OutboundInfo, description="出站消息队列相关配置")
+    governor: GovernorInfo = model_field(default_factory=GovernorInfo, description="API 调用治理相关配置")
+    cache: CacheInfo = model_field(default_factory=CacheInfo, description="缓存相关配置")
     prefix: list[str] = model_field(default_factory=list, description="命令前缀列表，支持多个前缀（如 ['/', '!']）")
     nickname: str = model_field(default="", description="Bot 昵称，主要用于命令匹配")
     cmd_count: int = model_field(default=4096, description="命令数量限制，超过该数量的命令将无法注册")
@@ -9,6 +9,7 @@ if TYPE_CHECKING:
     from arclet.alconna import Alconna
     from satori.client import Account
 
+    from .command.provider import PrefixResult
     from .message import MessageChain, Reply
     from .session import Session
 
@@ -19,6 +20,7 @@ ITEM_MESSAGE_CONTENT: CtxItem[MessageChain] = CtxItem.make("$message_content")
 ITEM_MESSAGE_REPLY: CtxItem[Reply] = CtxItem.make("$message_reply")
 ITEM_SESSION: CtxItem[Session] = CtxItem.make("$session")
 ITEM_ALCONNA: CtxItem[Alconna] = CtxItem.make("$alconna_command")
+ITEM_COMMAND_PREFIX: CtxItem[PrefixResult] = CtxItem.make("$command_prefix")
 
 ITEM_OPERATOR: CtxItem[satori.User] = CtxItem.make("$operator")
 ITEM_USER: CtxItem[satori.User] = CtxItem.make("$user")
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+from collections.abc import Iterator, Mapping
+from typing import Any
+
+from arclet.letoderea import Contexts
+
+_MISSING: Any = object()
+
+
+class OverlayContexts(Contexts):
+    """写时复制的上下文
+
+    读取时先查找自身写入的键，再回退到父上下文；写入与删除只作用于自身，父上下文不会被修改。
+    创建时无需复制父上下文，适用于将同一个事件上下文分发给大量订阅者、而每个订阅者只写入少量键的场景。
+
+    父上下文在覆盖层的生命周期内应视为只读。
+
+    Args:
+        parent: 父上下文
+    """
+
+    __slots__ = ("parent", "_deleted")
+
+    def __init__(self, parent: Mapping[str, Any]):
+        super().__init__()
+        self.parent = parent
+        self._deleted: set[str] = set()
+
+    def _visible(self, key: str) -> bool:
+        return key in self.parent and key not in self._deleted
+
+    def __missing__(self, key: str):
+        if self._visible(key):
+            return self.parent[key]
+        raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        return dict.__contains__(self, key) or self._visible(key)  # type: ignore
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if dict.__contains__(self, key):
+            return dict.__getitem__(self, key)
+        if self._visible(key):
+            return self.parent[key]
+        return default
+
+    def __setitem__(self, key: str, value: Any):
+        dict.__setitem__(self, key, value)
+        if self._deleted:
+            self._deleted.discard(key)
+
+    def update(self, *args, **kwargs):
+        items = dict(*args, **kwargs)
+        dict.update(self, items)
+        if self._deleted:
+            self._deleted.difference_update(items)
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        if key in self:
+            return self[key]
+        self[key] = default
+        return default
+
+    def __delitem__(self, key: str):
+        if self.pop(key, _MISSING) is _MISSING:
+            raise KeyError(key)
+
+    def pop(self, key: str, default: Any = _MISSING) -> Any:
+        value = dict.pop(self, key, _MISSING)
+        if self._visible(key):
+            if value is _MISSING:
+                value = self.parent[key]
+            self._deleted.add(key)
+        if value is _MISSING:
+            if default is _MISSING:
+                raise KeyError(key)
+            return default
+        return value
+
+    def popitem(self) -> tuple[str, Any]:
+        for key in reversed(list(self.materialize())):
+            return key, self.pop(key)
+        raise KeyError("popitem(): dictionary is empty")
+
+    def clear(self):
+        dict.clear(self)
+        self.parent = {}
+        self._deleted.clear()
+
+    def materialize(self) -> dict[str, Any]:
+        """合并父上下文与自身写入的键，得到一个普通的字典"""
+        if self._deleted:
+            result = {k: v for k, v in self.parent.items() if k not in self._deleted}
+        else:
+            result = dict(self.parent)
+        result.update(dict.items(self))
+        return result
+
+    def copy(self) -> OverlayContexts:  # type: ignore[override]
+        if not dict.__len__(self) and not self._deleted:
+            return OverlayContexts(self.parent)
+        return OverlayContexts(self)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.materialize())
+
+    def __len__(self) -> int:
+        return len(self.materialize())
+
+    def keys(self):  # type: ignore[override]
+        return self.materialize().keys()
+
+    def values(self):  # type: ignore[override]
+        return self.materialize().values()
+
+    def items(self):  # type: ignore[override]
+        return self.materialize().items()
+
+    def __eq__(self, other: object) -> bool:
+        return self.materialize() == other
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.materialize()!r})"
@@ -11,7 +11,6 @@ import arclet.letoderea as le
 from arclet.alconna import Alconna
 from arclet.alconna import config as alconna_config
 from arclet.letoderea import EVENT, Contexts, Param, Provider, ProviderFactory, global_providers
-from arclet.letoderea.context import shared_suppliers
 from arclet.letoderea.scope import Scope, configure
 from creart import it
 from graia.amnesia.builtins.aiohttp import AiohttpClientService
@@ -22,12 +21,15 @@ from satori.client import App
 from satori.client.account import Account
 from satori.client.config import Config, WebhookInfo, WebsocketsInfo
 from satori.client.protocol import ApiProtocol
+from satori.element import Element
 from satori.model import EmojiObject, Event, Friend, Guild, Login, Member, MessageObject, Role, User
 from tarina.generic import generic_isinstance, get_origin, is_optional
 
+from .bulk import BroadcastReport, ChannelTarget
+from .cache import entity_cache, message_cache, record_event
 from .config import BasicConfModel, EntariConfig
 from .config.action import config_model_validate
-from .config.model import LogInfo
+from .config.model import CacheInfo, GovernorInfo, IgnoreInfo, IngressInfo, LogInfo, OutboundInfo
 from .const import (
     ITEM_ACCOUNT,
     ITEM_ALCONNA,
@@ -46,17 +48,21 @@ from .const import (
     ITEM_SESSION,
     ITEM_USER,
 )
-from .event.base import MessageCreatedEvent, event_parse
+from .event.base import MessageCreatedEvent, MessageEvent, SatoriEvent, event_parse
 from .event.config import ConfigReload
 from .event.lifespan import AccountUpdate
 from .event.send import SendResponse
+from .governor import governor
+from .ingress import EventFilter, EventIngress, resolve_lanes
 from .localdata import local_data
 from .logger import apply_log_save, enable_rich_except, log
 from .message import MessageChain
+from .outbound import outbound
 from .plugin import get_plugins, load_plugin, plugin_config, requires
 from .plugin.model import PluginMetadata, PluginRole, RootlessPlugin
 from .plugin.service import plugin_service
-from .session import EntariProtocol, Session
+from .session import EntariProtocol, Session, broadcast
+from .upload import uploads
 
 
 class ApiProtocolProvider(Provider[ApiProtocol]):
@@ -72,8 +78,7 @@ class SessionProviderFactory(ProviderFactory):
             self.target_type = target_type
 
         async def __call__(self, context: Contexts):
-            if ITEM_SESSION in context and isinstance(context[ITEM_SESSION], Session):
-                sess = context[ITEM_SESSION]
+            if isinstance(sess := get_session(context), Session):
                 if self.target_type and not generic_isinstance(sess.event, self.target_type):
                     return
                 return sess
@@ -232,17 +237,25 @@ global_providers.extend(
 )
 
 
-@shared_suppliers.append
-async def session_supplier(context: Contexts):
+def get_session(context: Contexts) -> Session | None:
+    """获取当前上下文对应的 Session
+
+    由事件产生的 Session 只在首次被需要时创建，并由同一事件的所有订阅者共享，
+    其消息内容直接复用事件已解析的消息链。
+    """
     if ITEM_SESSION in context:
-        return
-    if ITEM_ORIGIN_EVENT in context and ITEM_ACCOUNT in context:
-        session = Session(context[ITEM_ACCOUNT], context[EVENT])
-        if ITEM_MESSAGE_CONTENT in context:
-            session.elements = context[ITEM_MESSAGE_CONTENT]
+        return context[ITEM_SESSION]
+    if ITEM_ORIGIN_EVENT not in context or ITEM_ACCOUNT not in context:
+        return None
+    event: SatoriEvent = context[EVENT]
+    if (session := event._session) is None:
+        session = event._session = Session(context[ITEM_ACCOUNT], event)
         if ITEM_MESSAGE_REPLY in context:
             session.reply = context[ITEM_MESSAGE_REPLY]
-        context[ITEM_SESSION] = session
+        elif isinstance(event, MessageEvent) and isinstance(event._prepared, dict):
+            session.reply = event._prepared.get(ITEM_MESSAGE_REPLY)
+    context[ITEM_SESSION] = session
+    return session
 
 
 class RecordConfig(BasicConfModel):
@@ -268,9 +281,11 @@ def record(plg: RootlessPlugin):
     # fmt: off
 
     @le.on(MessageCreatedEvent, priority=0)
-    async def log_msg(event: MessageCreatedEvent, is_notice_me: bool = False, is_reply_me: bool = False):
-        if cfg.to_me_only and not is_notice_me and not is_reply_me:
-            return
+    async def log_msg(event: MessageCreatedEvent):
+        if cfg.to_me_only:
+            prepared = await event.prepare()
+            if not prepared["is_notice_me"] and not prepared["is_reply_me"]:
+                return
         if "guild.plain" in event.login.features or not event.guild or (event.guild and event.guild.id == event.channel.id):  # noqa: E501
             scene = f"[{event.channel.name or event.channel.id}" + (f"({event.channel.id})]" if event.channel.name else "]")  # noqa: E501
         else:
@@ -333,6 +348,8 @@ class Entari(App):
             external_dirs=external_dirs,
             rich_error=config.basic.log.rich_error,
             gen_schema=config.basic.schema,
+            ingress=config.basic.ingress,
+            ignore=config.basic.ignore,
         )
 
     def __init__(
@@ -344,6 +361,8 @@ class Entari(App):
         external_dirs: Sequence[str | os.PathLike[str]] | None = None,
         rich_error: bool = False,
         gen_schema: bool = False,
+        ingress: IngressInfo | None = None,
+        ignore: IgnoreInfo | None = None,
     ):
         from . import __version__
 
@@ -371,11 +390,33 @@ class Entari(App):
         log.ignores.update(EntariConfig.instance.basic.log.ignores)
         log.core.debug(f"Log level set to <y><c>{log_level}</c></y>")
         log.core.debug(f"Config loaded from <m>{EntariConfig.instance.path}</m>: <w>{EntariConfig.instance.data}</w>")
-        self.ignore_self_message = ignore_self_message
         self.register(self.handle_event)
         self.lifecycle(self.account_hook)
         self._ref_tasks = set()
         self.gen_schema = gen_schema
+        cache = EntariConfig.instance.basic.cache
+        message_cache.resize(cache.message_size, cache.message_ttl)
+        entity_cache.resize(cache.entity_size, cache.entity_ttl)
+        uploads.update(cache.upload, cache.upload_ttl)
+        ignore = ignore or EntariConfig.instance.basic.ignore
+        self.event_filter = EventFilter(
+            ignore_self_message, ignore.platforms, ignore.guilds, ignore.channels, ignore.users
+        )
+        ingress = ingress or EntariConfig.instance.basic.ingress
+        self.ingress = EventIngress(
+            self.process_event,
+            ingress.workers,
+            ingress.queue_size,
+            ingress.overflow,
+            ingress.ordered,
+            ingress.lanes,
+            ingress.shed_latency,
+            ingress.shed_policy,
+        )
+        send = EntariConfig.instance.basic.outbound
+        outbound.update(send.rate, send.coalesce_window)
+        gov = EntariConfig.instance.basic.governor
+        governor.update(gov.enabled, gov.max_retries, gov.backoff, gov.failure_threshold, gov.cooldown)
 
         le.on(ConfigReload, self.reset_self, priority=0)
 
@@ -414,7 +455,15 @@ class Entari(App):
                         new_conf.save.colorize,
                     )
         elif key == "ignore_self_message":
-            self.ignore_self_message = value
+            self.event_filter.ignore_self_message = value
+        elif key == "cache":
+            new_conf = config_model_validate(CacheInfo, value)
+            message_cache.resize(new_conf.message_size, new_conf.message_ttl)
+            entity_cache.resize(new_conf.entity_size, new_conf.entity_ttl)
+            uploads.update(new_conf.upload, new_conf.upload_ttl)
+        elif key == "ignore":
+            new_conf = config_model_validate(IgnoreInfo, value)
+            self.event_filter.update(new_conf.platforms, new_conf.guilds, new_conf.channels, new_conf.users)
         elif key == "network":
             for conn in self.connections:
                 it(Launart).remove_component(conn)
@@ -432,6 +481,26 @@ class Entari(App):
             log.core.warning("External dirs cannot be changed at runtime, ignored.")
         elif key == "schema":
             self.gen_schema = value
+        elif key == "governor":
+            new_conf = config_model_validate(GovernorInfo, value)
+            governor.update(
+                new_conf.enabled, new_conf.max_retries, new_conf.backoff, new_conf.failure_threshold, new_conf.cooldown
+            )
+        elif key == "outbound":
+            new_conf = config_model_validate(OutboundInfo, value)
+            outbound.update(new_conf.rate, new_conf.coalesce_window)
+        elif key == "ingress":
+            new_conf = config_model_validate(IngressInfo, value)
+            self.ingress.overflow = new_conf.overflow
+            self.ingress.lanes = resolve_lanes(new_conf.lanes)
+            self.ingress.shed_latency = new_conf.shed_latency
+            self.ingress.shed_policy = new_conf.shed_policy
+            if (new_conf.workers, new_conf.queue_size, new_conf.ordered) != (
+                self.ingress.workers,
+                self.ingress.queue_size,
+                self.ingress.ordered,
+            ):
+                log.core.warning("Ingress workers, queue size and ordering cannot be changed at runtime, ignored.")
 
     @property
     def cache(self):
@@ -444,6 +513,28 @@ class Entari(App):
     def on_message(self, priority: int = 16):
         return le.on(MessageCreatedEvent, priority=priority)
 
+    async def broadcast(
+        self,
+        message: str | Iterable[str | Element],
+        targets: Iterable[ChannelTarget],
+        session: Session | None = None,
+        concurrency: int = 8,
+        rate: float = 0,
+    ) -> BroadcastReport:
+        """向多个频道发送同一条消息
+
+        Args:
+            message: 要发送的消息
+            targets: 由 (账号, 频道 ID) 构成的发送目标，可跨账号
+            session: 用于渲染消息中组件的会话
+            concurrency: 最大并发数
+            rate: 每个账号每秒最多发送的消息数，为 0 时不限制
+
+        Returns:
+            BroadcastReport: 各频道的发送回执与失败原因
+        """
+        return await broadcast(message, targets, session, concurrency, rate)
+
     def ensure_manager(self, manager: Launart):
         self.manager = manager
         manager.add_component(plugin_service)
@@ -468,11 +559,24 @@ class Entari(App):
         if self.gen_schema and EntariConfig.instance.path.exists():
             EntariConfig.instance.generate_schema(get_plugins())
 
+    @property
+    def ignore_self_message(self):
+        return self.event_filter.ignore_self_message
+
+    @ignore_self_message.setter
+    def ignore_self_message(self, value: bool):
+        self.event_filter.ignore_self_message = value
+
     async def handle_event(self, account: Account, event: Event):
+        # 缓存的更新先于过滤与入队，被过滤或降载丢弃的事件同样会使过期的实体缓存失效
+        record_event(account, event)
+        if self.event_filter.reject(account, event):
+            return
+        await self.ingress.put(account, event)
+
+    async def process_event(self, account: Account, event: Event):
         try:
             ev = event_parse(account, event)
-            if self.ignore_self_message and isinstance(ev, MessageCreatedEvent) and ev.user.id == account.self_id:
-                return
             await le.publish(ev)
             return
         except NotImplementedError:
@@ -486,7 +590,7 @@ class Entari(App):
             manager.add_component(conn)
 
         async with self.stage("preparing"):
-            ...
+            self.ingress.start()
 
         async with self.stage("blocking"):
             await any_completed(
@@ -495,6 +599,8 @@ class Entari(App):
             )
 
         async with self.stage("cleanup"):
+            await self.ingress.stop()
+            await outbound.stop()
             for account in self.accounts.values():
                 await self.account_update(account, LoginStatus.OFFLINE)
             self.accounts.clear()
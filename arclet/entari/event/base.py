@@ -1,8 +1,9 @@
+import asyncio
 from collections.abc import Callable
 from datetime import datetime
-from typing import Any, ClassVar, TypeVar, overload
+from typing import TYPE_CHECKING, Any, ClassVar, TypeVar, overload
 
-from arclet.letoderea import Contexts, Param, Provider, define
+from arclet.letoderea import EVENT, Contexts, Param, Provider, define
 from satori import ChannelType
 from satori import Event as OriginEvent
 from satori.client import Account
@@ -22,16 +23,18 @@ from satori.model import (
 )
 from tarina import gen_subclass
 
+from ..cache import get_message
 from ..const import (
     ITEM_ACCOUNT,
-    ITEM_GUILD,
     ITEM_MESSAGE_CONTENT,
-    ITEM_MESSAGE_ORIGIN,
     ITEM_MESSAGE_REPLY,
     ITEM_ORIGIN_EVENT,
 )
 from ..message import MessageChain, Reply
 
+if TYPE_CHECKING:
+    from ..session import Session
+
 T = TypeVar("T")
 D = TypeVar("D")
 
@@ -69,21 +72,25 @@ def _remove_notice_me(message: MessageChain, account: Account):
 class Attr:
     def __init__(self, key: str | None = None, cls: Callable[..., T] | None = None, internal: bool = False):
         self.key = key or ""
+        self.name = ""
         self.cls_ = cls
         self.internal = internal
 
     def __set_name__(self, owner: type["SatoriEvent"], name: str):
         self.key = self.key or name
-        if name not in ("id", "timestamp"):
-            owner._attrs.add(name)
+        self.name = name
 
     def __get__(self, instance: "SatoriEvent", owner: type["SatoriEvent"]):
+        if instance is None:
+            return self
+        if self.cls_ and self.name in instance._cache:
+            return instance._cache[self.name]
         if self.internal and instance._origin._data:
             val = instance._origin._data.get(self.key)
         else:
             val = getattr(instance._origin, self.key, None)
         if self.cls_ and val is not None:
-            return self.cls_(val)
+            val = instance._cache[self.name] = self.cls_(val)
         return val
 
     def __set__(self, instance: "SatoriEvent", value):
@@ -114,10 +121,25 @@ def attr(*args, internal: bool = False) -> Any:
     return Attr(key, cls, internal)
 
 
+def _collect_attrs(cls: type) -> set[str]:
+    return {
+        name
+        for base in cls.__mro__
+        for name, value in vars(base).items()
+        if isinstance(value, Attr) and name not in ("id", "timestamp")
+    }
+
+
 class SatoriEvent:
     type: ClassVar[str]
     _attrs: ClassVar[set[str]] = set()
+    """事件的所有属性"""
+    _extra_attrs: ClassVar[tuple[str, ...]] = ()
+    """事件在通用属性之外额外声明的属性，会在 gather 时写入上下文"""
     _origin: OriginEvent
+    _cache: dict[str, Any]
+    _session: "Session | None"
+    """按需创建的 Session，由同一事件的所有订阅者共享"""
     account: Account
 
     sn: int = attr()
@@ -136,20 +158,26 @@ class SatoriEvent:
     emoji: EmojiObject | None = attr()
 
     def __init_subclass__(cls, **kwargs):
-        cls._attrs = set()
+        super().__init_subclass__(**kwargs)
+        cls._attrs = _collect_attrs(cls)
+        cls._extra_attrs = tuple(cls._attrs - SatoriEvent._attrs)
 
     def __init__(self, account: Account, origin: OriginEvent):
         self.account = account
         self._origin = origin
+        self._cache = {}
+        self._session = None
 
     async def gather(self, context: Contexts):
+        # 通用属性 ($channel, $guild, $member 等) 不在此处写入，
+        # 而是由对应的 Provider 在被需要时从原始事件中读取
         context[ITEM_ACCOUNT] = self.account
         context[ITEM_ORIGIN_EVENT] = self._origin
 
-        for name in self.__class__._attrs:
+        for name in self._extra_attrs:
             value = getattr(self, name)
             if value is not None:
-                context[ITEM_MESSAGE_ORIGIN if name == "message" else f"${name}"] = value
+                context[f"${name}"] = value
 
     class TimeProvider(Provider[datetime]):
         def validate(self, param: Param):
@@ -163,6 +191,9 @@ class SatoriEvent:
         return f"<{self.__class__.__name__.removesuffix('Event')}{self._origin!r}>"
 
 
+SatoriEvent._attrs = _collect_attrs(SatoriEvent)
+
+
 class NoticeEvent(SatoriEvent):
     pass
 
@@ -188,10 +219,6 @@ class FriendRequestEvent(FriendEvent):
 class GuildEvent(NoticeEvent):
     guild: Guild = attr()
 
-    async def gather(self, context: Contexts):
-        await super().gather(context)
-        context[ITEM_GUILD] = self.guild
-
 
 class GuildAddedEvent(GuildEvent):
     type = EventType.GUILD_ADDED
@@ -297,9 +324,45 @@ class LoginUpdatedEvent(LoginEvent):
     type = EventType.LOGIN_UPDATED
 
 
+async def _prepared(context: Contexts, key: str):
+    # 回复、提及与消息内容等上下文条目按需解析：首次被需要时解析并写入当前上下文
+    if key in context:
+        return context[key]
+    if not isinstance(event := context.get(EVENT), MessageEvent):
+        return None
+    prepared = await event.prepare()
+    context.update(prepared)
+    return prepared.get(key)
+
+
 class ReplyProvider(Provider[Reply]):
     async def __call__(self, context: Contexts):
-        return context.get(ITEM_MESSAGE_REPLY)
+        return await _prepared(context, ITEM_MESSAGE_REPLY)
+
+
+class ContentProvider(Provider[MessageChain]):
+    priority = 25
+
+    async def __call__(self, context: Contexts):
+        return await _prepared(context, ITEM_MESSAGE_CONTENT)
+
+
+class _FlagProvider(Provider[bool]):
+    name: ClassVar[str]
+
+    def validate(self, param: Param):
+        return param.name == self.name and super().validate(param)
+
+    async def __call__(self, context: Contexts):
+        return await _prepared(context, self.name)
+
+
+class ReplyMeProvider(_FlagProvider):
+    name = "is_reply_me"
+
+
+class NoticeMeProvider(_FlagProvider):
+    name = "is_notice_me"
 
 
 class MessageEvent(SatoriEvent):
@@ -307,44 +370,94 @@ class MessageEvent(SatoriEvent):
     user: User = attr()
     message: MessageObject = attr()
 
-    content: MessageChain
-    quote: Quote | None = None
-
-    providers = [ReplyProvider]
+    providers = [ReplyProvider, ContentProvider, ReplyMeProvider, NoticeMeProvider]
 
     def __init__(self, account: Account, origin: OriginEvent):
         super().__init__(account, origin)
-        self.content = MessageChain(self.message.message)
-        if self.content.has(Quote):
-            self.quote = self.content.get(Quote, 1)[0]
-            self.content = self.content.exclude(Quote)
+        self._content: MessageChain | None = None
+        self._quote: Quote | None = None
+        self._parsed = False
+        self._prepared: dict[str, Any] | asyncio.Future[dict[str, Any]] | None = None
+
+    def _parse_content(self):
+        self._parsed = True
+        content = MessageChain(self.message.message if self.message else [])
+        if content.has(Quote):
+            self._quote = content.get(Quote, 1)[0]
+            content = content.exclude(Quote)
+        if self._content is None:
+            self._content = content
+
+    @property
+    def content(self) -> MessageChain:
+        """消息内容 (不包含引用)，在首次访问时构造，并与该事件的 Session 共享"""
+        if not self._parsed:
+            self._parse_content()
+        return self._content  # type: ignore
+
+    @content.setter
+    def content(self, value: MessageChain):
+        if not self._parsed:
+            self._parse_content()
+        self._content = value
+
+    @property
+    def quote(self) -> Quote | None:
+        if not self._parsed:
+            self._parse_content()
+        return self._quote
+
+    @quote.setter
+    def quote(self, value: Quote | None):
+        if not self._parsed:
+            self._parse_content()
+        self._quote = value
+
+    async def prepare(self) -> dict[str, Any]:
+        """解析引用的消息，判断消息是否回复或提及了 Bot，并移除消息开头的提及
+
+        返回需要写入上下文的条目 (`is_reply_me`、`is_notice_me`、消息内容与回复)。
+        结果在事件的生命周期内只计算一次，由所有订阅者共享；
+        `gather` 不会调用此方法，只有订阅者需要这些条目时才会解析消息。
+        """
+        if isinstance(self._prepared, dict):
+            return self._prepared
+        if self._prepared is None:
+            if self.quote and self.quote.id and not self.quote.children:
+                # 需要获取被引用的消息时，并发的订阅者等待同一次获取
+                self._prepared = asyncio.ensure_future(self._prepare())
+            else:
+                self._prepared = self._resolve(None)
+                return self._prepared
+        return await asyncio.shield(self._prepared)
 
-    async def gather(self, context: Contexts):
-        await super().gather(context)
+    async def _prepare(self) -> dict[str, Any]:
+        mo = await get_message(self.account, self.channel.id, self.quote.id)  # type: ignore
+        self._prepared = self._resolve(mo)
+        return self._prepared
+
+    def _resolve(self, quoted: MessageObject | None) -> dict[str, Any]:
+        result: dict[str, Any] = {}
         reply = None
         if self.quote and self.quote.id:
-            if self.quote.children:
-                mo = MessageObject.from_elements(self.quote.id, self.quote.children)
-            else:
-                mo = await self.account.protocol.message_get(self.channel.id, self.quote.id)
-            reply = context[ITEM_MESSAGE_REPLY] = Reply(self.quote, mo)
-        if not reply:
-            is_reply_me = False
-        else:
-            is_reply_me = _is_reply_me(reply, self.account)
-        context["is_reply_me"] = is_reply_me
+            mo = quoted or MessageObject.from_elements(self.quote.id, self.quote.children)
+            reply = result[ITEM_MESSAGE_REPLY] = Reply(self.quote, mo)
+            if self._session is not None:
+                self._session.reply = reply
+        is_reply_me = result["is_reply_me"] = bool(reply) and _is_reply_me(reply, self.account)  # type: ignore
         if is_reply_me and self.content and isinstance(self.content[0], Text):
             text = self.content[0].text.lstrip()
             if not text:
                 self.content.pop(0)
             else:
                 self.content[0] = Text(text)
-        is_notice_me = context["is_notice_me"] = _is_notice_me(self.content, self.account)
+        is_notice_me = result["is_notice_me"] = _is_notice_me(self.content, self.account)
         if is_notice_me:
             self.content = _remove_notice_me(self.content, self.account)
         if self.channel.type is ChannelType.DIRECT:
-            context["is_notice_me"] = True
-        context[ITEM_MESSAGE_CONTENT] = self.content
+            result["is_notice_me"] = True
+        result[ITEM_MESSAGE_CONTENT] = self.content
+        return result
 
 
 class MessageCreatedEvent(MessageEvent):
@@ -386,7 +499,10 @@ class InteractionButtonEvent(InteractionEvent):
 
     class ButtonProvider(Provider[ButtonInteraction]):
         async def __call__(self, context: Contexts):
-            return context.get("$button")
+            if "$button" in context:
+                return context["$button"]
+            if ITEM_ORIGIN_EVENT in context:
+                return context[ITEM_ORIGIN_EVENT].button
 
 
 class InteractionCommandEvent(InteractionEvent):
@@ -398,7 +514,10 @@ class InteractionCommandArgvEvent(InteractionCommandEvent):
 
     class ArgvProvider(Provider[ArgvInteraction]):
         async def __call__(self, context: Contexts):
-            return context.get("$argv")
+            if "$argv" in context:
+                return context["$argv"]
+            if ITEM_ORIGIN_EVENT in context:
+                return context[ITEM_ORIGIN_EVENT].argv
 
 
 class InteractionCommandMessageEvent(InteractionCommandEvent, MessageEvent):
@@ -415,19 +534,40 @@ for cls in gen_subclass(SatoriEvent):
 
 
 INTERNAL_ADDITIONAL_HANDLERS: list[Callable[[str, str, dict[str, Any]], type[SatoriEvent] | None]] = []
+_INTERNAL_RESOLVED: dict[tuple[str, str], type[SatoriEvent] | None] = {}
+"""(event.type, event._type) -> 事件类型 的解析缓存"""
+
+
+def _resolve_internal(event: OriginEvent) -> type[SatoriEvent] | None:
+    key = (event.type, event._type)  # type: ignore
+    try:
+        return _INTERNAL_RESOLVED[key]
+    except KeyError:
+        pass
+    found = None
+    for handler in INTERNAL_ADDITIONAL_HANDLERS:
+        if (found := handler(event.type, event._type, event._data)) is not None:  # type: ignore
+            define(found, name=found.type)
+            break
+    _INTERNAL_RESOLVED[key] = found
+    return found
 
 
 def event_parse(account: Account, event: OriginEvent):
     constructor_cls = MAPPING.get(event.type)
     if (constructor_cls is None or event.type == EventType.INTERNAL) and event._type and event._data:
-        found = next((h(event.type, event._type, event._data) for h in INTERNAL_ADDITIONAL_HANDLERS), None)
-        if found is not None:
+        if (found := _resolve_internal(event)) is not None:
             constructor_cls = found
-            define(constructor_cls, name=constructor_cls.type)
     if constructor_cls is None:
         raise NotImplementedError(f"Unsupported event type: {event.type}")
     return constructor_cls(account, event)
 
 
 def register_internal_event(func: Callable[[str, str, dict[str, Any]], type[SatoriEvent] | None]):
+    """注册内部事件的解析函数
+
+    解析函数接收 (event.type, event._type, event._data)，返回对应的事件类型或 None。
+    解析结果会按 (event.type, event._type) 缓存，因此返回值不应依赖于 `_data` 的具体内容。
+    """
     INTERNAL_ADDITIONAL_HANDLERS.append(func)
+    _INTERNAL_RESOLVED.clear()
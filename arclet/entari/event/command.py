@@ -11,7 +11,7 @@ from ..const import (
 )
 from ..message import MessageChain
 from ..session import Session
-from .base import Reply
+from .base import MessageEvent, Reply
 
 
 @make_event(name="entari.event/command/execute")
@@ -28,6 +28,8 @@ class CommandExecute:
         if self.session:
             context[ITEM_SESSION] = self.session
             await self.session.event.gather(context)
+            if isinstance(self.session.event, MessageEvent):
+                context.update(await self.session.event.prepare())
             context.pop(str(ITEM_ORIGIN_EVENT), None)
             context.pop(str(ITEM_MESSAGE_CONTENT), None)
             context.pop(str(ITEM_MESSAGE_ORIGIN), None)
@@ -7,6 +7,7 @@ from satori.client import Account
 from satori.exception import ActionFailed
 from satori.model import Channel, MessageObject
 
+from ..cache import get_channel
 from ..const import ITEM_ACCOUNT, ITEM_CHANNEL, ITEM_MESSAGE_CONTENT, ITEM_SESSION
 from ..message import MessageChain
 
@@ -38,7 +39,7 @@ async def req_gather(req: SendRequest, context: Contexts):
         context[ITEM_CHANNEL] = req.session.channel
     else:
         try:
-            context[ITEM_CHANNEL] = await req.account.channel_get(req.channel)
+            context[ITEM_CHANNEL] = await get_channel(req.account, req.channel)
         except ActionFailed:
             context[ITEM_CHANNEL] = Channel(
                 req.channel, ChannelType.DIRECT if req.channel.startswith("private:") else ChannelType.TEXT
@@ -68,7 +69,7 @@ async def resp_gather(resp: SendResponse, context: Contexts):
         context[ITEM_CHANNEL] = resp.session.channel
     else:
         try:
-            context[ITEM_CHANNEL] = await resp.account.channel_get(resp.channel)
+            context[ITEM_CHANNEL] = await get_channel(resp.account, resp.channel)
         except ActionFailed:
             context[ITEM_CHANNEL] = Channel(
                 resp.channel, ChannelType.DIRECT if resp.channel.startswith("private:") else ChannelType.TEXT
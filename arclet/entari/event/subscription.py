@@ -0,0 +1,66 @@
+"""订阅者索引
+
+letoderea 在分发事件时总会先为事件收集上下文 (gather)，即便没有任何订阅者会收到这个事件。
+对于 `SendRequest`、`CommandReceive` 等框架内部事件，收集上下文本身可能就需要网络请求。
+
+此处按需从所有作用域的订阅者中计算 "存在订阅者的发布者" 集合并缓存。
+缓存以每个作用域的启用状态、订阅者数量与最后注册的订阅者为依据：
+订阅者总是追加在作用域末尾，因此无论作用域是否属于插件，任何增删、启停都会使缓存失效。
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from arclet.letoderea.publisher import get_publishers
+
+try:
+    from arclet.letoderea.scope import _scopes
+except ImportError:  # pragma: no cover
+    # letoderea 未公开作用域的注册表；若其内部结构变化，则不跳过任何事件的分发
+    _scopes = None
+
+_State = tuple[Any, bool, int, Any]
+
+_indexed: list[_State] = []
+_listened: set[str] = set()
+
+
+def _states() -> list[_State]:
+    return [
+        (scope, scope.available, len(scope.subscribers), scope.subscribers[-1] if scope.subscribers else None)
+        for scope in list(_scopes.values())  # type: ignore
+    ]
+
+
+def _unchanged(states: list[_State]) -> bool:
+    # 作用域与订阅者按对象身份比较，旧状态持有其引用，不会与新注册的对象混淆
+    return len(states) == len(_indexed) and all(
+        new[0] is old[0] and new[1] == old[1] and new[2] == old[2] and new[3] is old[3]
+        for new, old in zip(states, _indexed)
+    )
+
+
+def listened_publishers() -> set[str]:
+    """当前存在订阅者的发布者 id 集合；存在监听所有事件的订阅者时包含 `$backend`"""
+    global _indexed
+    states = _states()
+    if not _unchanged(states):
+        _listened.clear()
+        for scope, available, *_ in states:
+            if available:
+                _listened.update(slot.publisher_id for slot in scope.subscribers)
+        _indexed = states
+    return _listened
+
+
+def has_subscribers(event: Any) -> bool:
+    """判断事件在分发时是否会有订阅者接收"""
+    if _scopes is None:  # pragma: no cover
+        return True
+    listened = listened_publishers()
+    if not listened:
+        return False
+    if "$backend" in listened:
+        return True
+    return any(pub_id in listened for pub_id in get_publishers(event))
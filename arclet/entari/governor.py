@@ -0,0 +1,286 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from email.utils import parsedate_to_datetime
+from typing import Any, Literal, TypeVar
+
+from aiohttp import ClientError, ClientResponseError
+from satori.client.account import Account
+from satori.const import Api
+from satori.exception import ApiNotAvailable, ServerException
+
+from .logger import log
+
+T = TypeVar("T")
+
+CircuitState = Literal["closed", "open", "half-open"]
+
+
+class CircuitOpenError(ApiNotAvailable):
+    """账号的熔断器处于打开状态，调用被直接拒绝"""
+
+
+def is_idempotent(action: str) -> bool:
+    """只读的 API (`*.get` 与 `*.list`) 可以安全地重试"""
+    return action.endswith((".get", ".list"))
+
+
+def retry_after(exc: BaseException) -> float | None:
+    """从 429 响应的 `Retry-After` 头中读取需要等待的秒数"""
+    if not isinstance(exc, ClientResponseError) or not exc.headers:
+        return None
+    if (value := exc.headers.get("Retry-After")) is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """从限流响应中学习速率的令牌桶
+
+    初始时不限制速率；每次被限流时将速率减半 (首次被限流时以近期的调用速率为基准)，
+    此后每个无限流的周期逐步恢复速率，恢复到初始基准的数倍后重新取消限制。
+    """
+
+    def __init__(self, min_rate: float = 0.2, recover: float = 0.1):
+        self.min_rate = min_rate
+        self.recover = recover
+        self.rate: float | None = None
+        """当前每秒允许的调用数，为 None 时不限制"""
+        self.ceiling = 0.0
+        self.tokens = 1.0
+        self.blocked_until = 0.0
+        self._updated = time.monotonic()
+        self._recent: deque[float] = deque(maxlen=32)
+
+    def _observed_rate(self, now: float) -> float:
+        recent = [t for t in self._recent if now - t < 10]
+        if not recent:
+            return 0.0
+        return len(recent) / max(now - recent[0], 1.0)
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._updated = now
+        if self.rate is None:
+            return
+        self.rate += self.recover * self.rate * elapsed
+        if self.rate >= self.ceiling:
+            self.rate = None
+            return
+        self.tokens = min(self.tokens + elapsed * self.rate, max(self.rate, 1.0))
+
+    def delay(self) -> float:
+        """取出一个令牌，返回取出前需要等待的秒数"""
+        now = time.monotonic()
+        self._refill(now)
+        self._recent.append(now)
+        wait = max(self.blocked_until - now, 0.0)
+        if self.rate is None:
+            return wait
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return wait
+        return max(wait, -self.tokens / self.rate)
+
+    def limited(self, after: float | None = None):
+        """记录一次限流"""
+        now = time.monotonic()
+        self._refill(now)
+        if self.rate is None:
+            base = max(self._observed_rate(now), self.min_rate * 2)
+            self.ceiling = base * 4
+            self.rate = base
+        self.rate = max(self.rate / 2, self.min_rate)
+        if after:
+            self.blocked_until = max(self.blocked_until, now + after)
+
+
+class CircuitBreaker:
+    """连续失败达到阈值后打开，冷却结束后放行一次试探调用，试探成功则关闭"""
+
+    def __init__(self, name: str, threshold: int = 5, cooldown: float = 30):
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state: CircuitState = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def allow(self) -> bool:
+        if self.state == "closed" or self.threshold <= 0:
+            return True
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            self.state = "half-open"
+            log.core.info(f"API circuit of <y>{self.name}</y> is half-open, probing")
+        if self._probing:
+            return False
+        self._probing = True
+        return True
+
+    def release(self):
+        """试探调用未得出结果 (例如被取消) 时放弃试探，之后的调用可以重新试探"""
+        if self.state == "half-open":
+            self._probing = False
+
+    def success(self):
+        self._probing = False
+        self.failures = 0
+        if self.state != "closed":
+            self.state = "closed"
+            log.core.info(f"API circuit of <y>{self.name}</y> is closed")
+
+    def failure(self):
+        self._probing = False
+        self.failures += 1
+        if self.threshold <= 0:
+            return
+        if self.state == "half-open" or (self.state == "closed" and self.failures >= self.threshold):
+            self.state = "open"
+            self.opened_at = time.monotonic()
+            log.core.warning(
+                f"API circuit of <y>{self.name}</y> is open after <r>{self.failures}</r> failures, "
+                f"calls are rejected for {self.cooldown}s"
+            )
+
+
+class ApiGovernor:
+    """API 调用治理
+
+    - 每个账号的每个 API 拥有独立的 `TokenBucket`，根据限流响应 (HTTP 429) 与其中的 `Retry-After` 学习调用速率；
+    - 只读 API 在遇到限流、服务端错误或网络错误时按指数退避重试；
+    - 每个账号拥有一个 `CircuitBreaker`，服务端错误、网络错误与限流持续发生时打开，期间的调用直接失败。
+
+    Args:
+        enabled: 是否启用，不启用时直接调用 (默认不启用)
+        max_retries: 只读 API 的最大重试次数
+        backoff: 重试的基础退避时间 (秒)，每次重试翻倍
+        failure_threshold: 打开熔断器所需的连续失败次数，为 0 时不熔断
+        cooldown: 熔断器打开后的冷却时间 (秒)
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        max_retries: int = 2,
+        backoff: float = 0.5,
+        failure_threshold: int = 5,
+        cooldown: float = 30,
+    ):
+        self.enabled = enabled
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.buckets: dict[tuple[str, str, str], TokenBucket] = {}
+        self.breakers: dict[tuple[str, str], CircuitBreaker] = {}
+        self.metrics: dict[tuple[str, str], dict[str, float]] = {}
+
+    def update(
+        self,
+        enabled: bool = False,
+        max_retries: int = 2,
+        backoff: float = 0.5,
+        failure_threshold: int = 5,
+        cooldown: float = 30,
+    ):
+        self.enabled = enabled
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        for breaker in self.breakers.values():
+            breaker.threshold = failure_threshold
+            breaker.cooldown = cooldown
+
+    def _breaker(self, key: tuple[str, str]) -> CircuitBreaker:
+        if (breaker := self.breakers.get(key)) is None:
+            breaker = self.breakers[key] = CircuitBreaker("/".join(key), self.failure_threshold, self.cooldown)
+            self.metrics[key] = dict.fromkeys(("calls", "failures", "retries", "limited", "rejected", "waited"), 0)
+        return breaker
+
+    async def call(self, account: Account, action: str | Api, call: Callable[[], Awaitable[T]]) -> T:
+        if not self.enabled:
+            return await call()
+        api = action.value if isinstance(action, Api) else action
+        key = (account.platform, account.self_id)
+        breaker = self._breaker(key)
+        metrics = self.metrics[key]
+        if (bucket := self.buckets.get((*key, api))) is None:
+            bucket = self.buckets[(*key, api)] = TokenBucket()
+        retries = self.max_retries if is_idempotent(api) else 0
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                metrics["rejected"] += 1
+                raise CircuitOpenError(f"API circuit of {breaker.name} is open, {api} rejected")
+            probing = breaker.state == "half-open"
+            try:
+                if (wait := bucket.delay()) > 0:
+                    metrics["waited"] += wait
+                    await asyncio.sleep(wait)
+                metrics["calls"] += 1
+                try:
+                    result = await call()
+                except (ClientResponseError, ServerException, ClientError, asyncio.TimeoutError) as e:
+                    limited = isinstance(e, ClientResponseError) and e.status == 429
+                    if isinstance(e, ClientResponseError) and not limited and e.status < 500:
+                        breaker.success()
+                        raise
+                    after = retry_after(e) if limited else None
+                    if limited:
+                        metrics["limited"] += 1
+                        bucket.limited(after)
+                    metrics["failures"] += 1
+                    breaker.failure()
+                    if attempt >= retries:
+                        raise
+                    attempt += 1
+                    metrics["retries"] += 1
+                    delay = max(after or 0.0, self.backoff * 2 ** (attempt - 1) * (1 + random.random() / 2))
+                    log.core.debug(f"retrying {api} of {breaker.name} in {delay:.2f}s ({attempt}/{retries}): {e!r}")
+                    await asyncio.sleep(delay)
+                except Exception:
+                    # 其他 ActionFailed (4xx) 说明服务端正常响应，不计入熔断
+                    breaker.success()
+                    raise
+                else:
+                    breaker.success()
+                    return result
+            finally:
+                if probing:
+                    breaker.release()
+
+    def report(self) -> dict[str, dict[str, Any]]:
+        """各账号的熔断状态、调用统计与已学习到的限流速率"""
+        result = {}
+        for key, breaker in self.breakers.items():
+            name = "/".join(key)
+            result[name] = {
+                "state": breaker.state,
+                "consecutive_failures": breaker.failures,
+                **self.metrics[key],
+                "rates": {
+                    api: round(bucket.rate, 3)
+                    for (*acc, api), bucket in self.buckets.items()
+                    if tuple(acc) == key and bucket.rate is not None
+                },
+            }
+        return result
+
+
+governor = ApiGovernor()
+"""全局 API 调用治理器"""
@@ -0,0 +1,336 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable, Iterable
+from contextvars import ContextVar
+from typing import Any, Literal
+
+from satori.client.account import Account
+from satori.const import EventType
+from satori.model import Event
+
+from .event.base import MAPPING
+from .logger import log
+
+OverflowPolicy = Literal["block", "drop_new", "drop_oldest"]
+ShedPolicy = Literal["drop", "coalesce"]
+
+LANES = {"high": 0, "normal": 1, "low": 2}
+LANE_NORMAL = LANES["normal"]
+LANE_LOW = LANES["low"]
+
+_slot: ContextVar[asyncio.Future | None] = ContextVar("_slot", default=None)
+
+
+def detach():
+    """将当前事件的处理从入口队列中分离
+
+    分离后，worker 不再等待当前事件处理完毕，便会继续处理队列中的后续事件；
+    在保序模式下，同一频道的后续事件也会开始处理。
+
+    需要在处理过程中等待后续事件时 (例如 `Session.prompt`) 调用，否则后续事件将永远排在当前事件之后。
+    """
+    if (slot := _slot.get()) and not slot.done():
+        slot.set_result(None)
+
+
+def event_key(account: Account, event: Event) -> tuple[str, str]:
+    """事件的顺序键，同一键下的事件在保序模式下按接收顺序依次处理"""
+    if event.channel:
+        return account.self_id, event.channel.id
+    if event.user:
+        return account.self_id, f"@{event.user.id}"
+    return account.self_id, ""
+
+
+class EventFilter:
+    """事件预过滤器
+
+    直接作用于原始的 `satori.Event`，在事件进入队列与 `event_parse` 之前丢弃无需处理的事件，
+    避免为其构造事件对象与消息链。
+    """
+
+    def __init__(
+        self,
+        ignore_self_message: bool = True,
+        platforms: Iterable[str] = (),
+        guilds: Iterable[str] = (),
+        channels: Iterable[str] = (),
+        users: Iterable[str] = (),
+    ):
+        self.ignore_self_message = ignore_self_message
+        self.update(platforms, guilds, channels, users)
+        self.rejected = 0
+        """被过滤的事件数量"""
+
+    def update(
+        self,
+        platforms: Iterable[str] = (),
+        guilds: Iterable[str] = (),
+        channels: Iterable[str] = (),
+        users: Iterable[str] = (),
+    ):
+        self.platforms = frozenset(platforms)
+        self.guilds = frozenset(guilds)
+        self.channels = frozenset(channels)
+        self.users = frozenset(users)
+
+    def reject(self, account: Account, event: Event) -> bool:
+        """判断事件是否应当被丢弃"""
+        user = event.user
+        if self.ignore_self_message and user and user.id == account.self_id and event.type == EventType.MESSAGE_CREATED:
+            self.rejected += 1
+            return True
+        if (
+            (self.platforms and account.platform in self.platforms)
+            or (self.users and user and user.id in self.users)
+            or (self.channels and event.channel and event.channel.id in self.channels)
+            or (self.guilds and event.guild and event.guild.id in self.guilds)
+        ):
+            self.rejected += 1
+            return True
+        return False
+
+
+def resolve_lanes(lanes: dict[str, str]) -> dict[str, int]:
+    """将配置中的事件通道解析为 `事件类型 -> 通道序号`
+
+    键可以是事件类型 (如 `guild-member-updated`)，也可以是 `MAPPING` 中事件类的名称 (如 `GuildMemberUpdatedEvent`)
+    """
+    names = {cls.__name__: typ for typ, cls in MAPPING.items()}
+    result = {}
+    for key, lane in lanes.items():
+        typ = names.get(key, key)
+        if typ not in MAPPING:
+            log.core.warning(f"Unknown event type <y>{key!r}</y> in ingress lanes, ignored.")
+            continue
+        if lane not in LANES:
+            log.core.warning(f"Unknown ingress lane <y>{lane!r}</y> for event type <y>{key!r}</y>, ignored.")
+            continue
+        result[typ] = LANES[lane]
+    return result
+
+
+def coalesce_key(account: Account, event: Event) -> tuple:
+    """可合并事件的键，同一键下仅有最新的事件有意义"""
+    return (
+        event.type,
+        account.self_id,
+        event.guild.id if event.guild else None,
+        event.channel.id if event.channel else None,
+        event.user.id if event.user else None,
+        event.message.id if event.message else None,
+    )
+
+
+class _LaneQueue(asyncio.Queue):
+    """按通道优先级出队的队列，条目为 `[lane, enqueued_at, account, event, coalesce_key]`"""
+
+    def _init(self, maxsize):
+        self._lanes: tuple[deque[list], ...] = tuple(deque() for _ in LANES)
+        self.pending: dict[tuple, list] = {}
+        """低优先级通道中等待合并的条目"""
+
+    def qsize(self):
+        return sum(len(lane) for lane in self._lanes)
+
+    def empty(self):
+        return not any(self._lanes)
+
+    def _put(self, item: list):
+        self._lanes[item[0]].append(item)
+        if item[4] is not None:
+            self.pending[item[4]] = item
+
+    def _pop(self, lane: deque[list]):
+        item = lane.popleft()
+        if item[4] is not None and self.pending.get(item[4]) is item:
+            del self.pending[item[4]]
+        return item
+
+    def _get(self):
+        return self._pop(next(lane for lane in self._lanes if lane))
+
+    def age(self, lane: int, now: float) -> float:
+        """指定通道中最早的条目已排队的时长"""
+        return now - self._lanes[lane][0][1] if self._lanes[lane] else 0.0
+
+    def drop_oldest(self) -> list:
+        """丢弃优先级最低的非空通道中最早的条目"""
+        item = self._pop(next(lane for lane in reversed(self._lanes) if lane))
+        self.task_done()
+        return item
+
+    def evict(self, lane: int) -> list | None:
+        """丢弃指定通道中最早的条目，通道为空时返回 None"""
+        if not self._lanes[lane]:
+            return None
+        item = self._pop(self._lanes[lane])
+        self.task_done()
+        return item
+
+
+class EventIngress:
+    """事件入口队列
+
+    网络连接收到的事件先进入有界队列，再由固定数量的 worker 取出并处理，
+    以此吸收突发流量，避免单个耗时的监听器阻塞后续事件的接收。
+
+    - 默认模式下，所有 worker 共享同一个队列，事件之间没有顺序保证；
+    - 保序模式下，事件按 `event_key` 分片到各个 worker 独占的队列中，
+      同一频道 (或私聊用户) 的事件严格按接收顺序处理，不同频道的事件并行处理。
+
+    每个队列内部按事件类型划分为高、普通、低三个优先级通道，worker 总是优先处理高优先级通道中的事件；
+    (保序仅在同一通道内成立)。当低优先级通道的排队延迟超过 `shed_latency` 时，
+    其中的事件会按 `shed_policy` 被丢弃 (`drop`) 或与尚未处理的同类事件合并 (`coalesce`)。
+    队列已满时，低优先级事件在入队时即被丢弃，其他通道的事件会挤掉排队中的低优先级事件，
+    因此低优先级事件的洪峰不会阻塞消息等事件的接收。
+
+    当 `workers` 为 0 时不启用队列，事件直接在调用方处理。
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Account, Event], Awaitable[None]],
+        workers: int = 0,
+        queue_size: int = 1024,
+        overflow: OverflowPolicy = "block",
+        ordered: bool = False,
+        lanes: dict[str, str] | None = None,
+        shed_latency: float = 0,
+        shed_policy: ShedPolicy = "drop",
+    ):
+        self.handler = handler
+        self.workers = max(workers, 0)
+        self.queue_size = max(queue_size, 0)
+        self.overflow: OverflowPolicy = overflow
+        self.ordered = ordered
+        self.lanes = resolve_lanes(lanes or {})
+        self.shed_latency = shed_latency
+        self.shed_policy: ShedPolicy = shed_policy
+        self.dropped = 0
+        """因队列溢出而被丢弃的事件数量"""
+        self.shed: dict[str, int] = {}
+        """因排队延迟过高而被丢弃的事件数量，按事件类型统计"""
+        self.coalesced: dict[str, int] = {}
+        """因排队延迟过高而被合并的事件数量，按事件类型统计"""
+        if not self.enabled:
+            shards = 0
+        else:
+            shards = self.workers if ordered else 1
+        maxsize = max(self.queue_size // shards, 1) if shards and self.queue_size else 0
+        self.queues: list[_LaneQueue] = [_LaneQueue(maxsize) for _ in range(shards)]
+        self._tasks: list[asyncio.Task] = []
+        self._running: set[asyncio.Task] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    @property
+    def depth(self) -> int:
+        """当前排队中的事件数量"""
+        return sum(queue.qsize() for queue in self.queues)
+
+    def _select(self, account: Account, event: Event):
+        if len(self.queues) == 1:
+            return self.queues[0]
+        return self.queues[hash(event_key(account, event)) % len(self.queues)]
+
+    async def put(self, account: Account, event: Event):
+        if not self._tasks:
+            await self.handler(account, event)
+            return
+        queue = self._select(account, event)
+        lane = self.lanes.get(event.type, LANE_NORMAL)
+        now = time.monotonic()
+        key = None
+        if lane == LANE_LOW and self.shed_policy == "coalesce":
+            key = coalesce_key(account, event)
+            if self.shed_latency > 0 and (entry := queue.pending.get(key)) and queue.age(lane, now) > self.shed_latency:
+                entry[2], entry[3] = account, event
+                self.coalesced[event.type] = self.coalesced.get(event.type, 0) + 1
+                return
+        item: list[Any] = [lane, now, account, event, key]
+        if queue.full():
+            # 队列已满时低优先级事件不参与等待，也不挤占其他通道：新的低优先级事件直接丢弃，
+            # 其他通道的事件则优先挤掉排队中的低优先级事件
+            if lane == LANE_LOW:
+                self.shed[event.type] = self.shed.get(event.type, 0) + 1
+                return
+            if (old := queue.evict(LANE_LOW)) is not None:
+                self.shed[old[3].type] = self.shed.get(old[3].type, 0) + 1
+        if self.overflow == "block":
+            await queue.put(item)
+            return
+        if queue.full():
+            self.dropped += 1
+            if self.overflow == "drop_new":
+                log.core.trace(f"ingress queue is full, dropped event {event.type}({event.sn})")
+                return
+            old = queue.drop_oldest()[3]
+            log.core.trace(f"ingress queue is full, dropped event {old.type}({old.sn})")
+        queue.put_nowait(item)
+
+    async def _handle(self, account: Account, event: Event, slot: asyncio.Future):
+        _slot.set(slot)
+        try:
+            await self.handler(account, event)
+        except Exception as e:
+            log.core.exception(f"failed to handle event {event.type}({event.sn}): {e!r}", exc_info=e)
+        finally:
+            if not slot.done():
+                slot.set_result(None)
+
+    async def _worker(self, queue: _LaneQueue):
+        loop = asyncio.get_running_loop()
+        while True:
+            lane, enqueued, account, event, _ = await queue.get()
+            if (
+                lane == LANE_LOW
+                and self.shed_policy == "drop"
+                and self.shed_latency > 0
+                and time.monotonic() - enqueued > self.shed_latency
+            ):
+                self.shed[event.type] = self.shed.get(event.type, 0) + 1
+                queue.task_done()
+                continue
+            slot = loop.create_future()
+            task = loop.create_task(self._handle(account, event, slot))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+            try:
+                await slot
+            finally:
+                queue.task_done()
+
+    def start(self):
+        if not self.enabled or self._tasks:
+            return
+        if self.ordered:
+            self._tasks = [asyncio.create_task(self._worker(queue)) for queue in self.queues]
+        else:
+            self._tasks = [asyncio.create_task(self._worker(self.queues[0])) for _ in range(self.workers)]
+        log.core.debug(
+            f"Event ingress started with <y>{self.workers}</y> workers, "
+            f"queue size <y>{self.queue_size}</y>{', ordered by channel' if self.ordered else ''}"
+        )
+
+    async def stop(self, timeout: float | None = 5):
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(asyncio.gather(*(queue.join() for queue in self.queues)), timeout)
+        except asyncio.TimeoutError:
+            log.core.warning(f"Event ingress stopped with <y>{self.depth}</y> events unprocessed")
+        for task in (*self._tasks, *self._running):
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._running, return_exceptions=True)
+        self._tasks.clear()
+        self._running.clear()
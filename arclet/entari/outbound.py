@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from typing import Any
+
+from satori.client.account import Account
+from satori.const import Api
+from satori.element import Quote, Text
+
+from .logger import log
+from .message import MessageChain
+
+
+class SendTicket:
+    """出站队列中的一个位置
+
+    位置在 `reserve` 时即确定，消息按占据位置的顺序发出；消息内容可以在之后由 `submit` 填入。
+    """
+
+    __slots__ = ("account", "channel_id", "message", "referrer", "filled", "result")
+
+    def __init__(self, account: Account, channel_id: str):
+        self.account = account
+        self.channel_id = channel_id
+        self.message: MessageChain | None = None
+        self.referrer: dict[str, Any] | None = None
+        self.filled = asyncio.Event()
+        self.result: asyncio.Future[tuple[list[dict], MessageChain]] = asyncio.get_running_loop().create_future()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.filled.is_set() and self.message is None
+
+
+class OutboundQueue:
+    """出站消息队列
+
+    每个 (账号, 频道) 拥有独立的队列，消息按调用顺序依次发出：
+
+    - `rate` 大于 0 时，同一频道每秒最多发送 `rate` 条消息；
+    - `coalesce_window` 大于 0 时，发送前会等待该时长，
+      并将期间同一频道内连续的、来源相同的消息合并为一次 `message.create` 调用。
+
+    两者均为 0 时不启用队列，消息直接发送。
+    """
+
+    def __init__(self, rate: float = 0, coalesce_window: float = 0):
+        self.rate = rate
+        self.coalesce_window = coalesce_window
+        self.coalesced = 0
+        """被合并到其他消息中发送的消息数量"""
+        self._queues: dict[tuple[str, str, str], deque[SendTicket]] = {}
+        self._workers: dict[tuple[str, str, str], asyncio.Task] = {}
+        self._sending: dict[tuple[str, str, str], list[SendTicket]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0 or self.coalesce_window > 0
+
+    @property
+    def depth(self) -> int:
+        """当前排队中的消息数量"""
+        return sum(len(queue) for queue in self._queues.values())
+
+    def update(self, rate: float = 0, coalesce_window: float = 0):
+        self.rate = rate
+        self.coalesce_window = coalesce_window
+
+    def reserve(self, account: Account, channel_id: str) -> SendTicket | None:
+        """在频道的队列中占据一个位置，未启用队列时返回 None"""
+        if not self.enabled:
+            return None
+        key = (account.platform, account.self_id, channel_id)
+        ticket = SendTicket(account, channel_id)
+        self._queues.setdefault(key, deque()).append(ticket)
+        if key not in self._workers:
+            self._workers[key] = asyncio.create_task(self._worker(key))
+        return ticket
+
+    async def submit(
+        self, ticket: SendTicket, message: MessageChain, referrer: dict[str, Any] | None = None
+    ) -> tuple[list[dict], MessageChain]:
+        """填入消息并等待其发出
+
+        Returns:
+            tuple[list[dict], MessageChain]: `message.create` 的原始返回值，以及实际发出的 (可能经过合并的) 消息
+        """
+        ticket.message = message
+        ticket.referrer = referrer
+        ticket.filled.set()
+        return await ticket.result
+
+    def cancel(self, ticket: SendTicket):
+        """放弃占据的位置，用于消息最终不会被发送的情况"""
+        if not ticket.filled.is_set():
+            ticket.filled.set()
+
+    def _take(self, queue: deque[SendTicket], head: SendTicket) -> list[SendTicket]:
+        batch = [head]
+        if self.coalesce_window <= 0:
+            return batch
+        while queue and queue[0].filled.is_set():
+            ticket = queue[0]
+            if ticket.cancelled:
+                queue.popleft()
+                continue
+            if ticket.referrer != head.referrer or any(isinstance(elem, Quote) for elem in ticket.message):  # type: ignore
+                break
+            batch.append(queue.popleft())
+        return batch
+
+    async def _worker(self, key: tuple[str, str, str]):
+        queue = self._queues[key]
+        last_sent = 0.0
+        try:
+            while True:
+                while queue:
+                    head = queue[0]
+                    await head.filled.wait()
+                    if head.cancelled:
+                        queue.popleft()
+                        continue
+                    if self.coalesce_window > 0:
+                        await asyncio.sleep(self.coalesce_window)
+                    queue.popleft()
+                    batch = self._take(queue, head)
+                    if self.rate > 0 and (delay := last_sent + 1 / self.rate - time.monotonic()) > 0:
+                        await asyncio.sleep(delay)
+                    self._sending[key] = batch
+                    try:
+                        await self._send(head, batch)
+                    finally:
+                        del self._sending[key]
+                    last_sent = time.monotonic()
+                # 限速时在间隔结束前保留 worker，使间隔内到达的消息同样受到限制
+                if self.rate <= 0 or (delay := last_sent + 1 / self.rate - time.monotonic()) <= 0:
+                    break
+                await asyncio.sleep(delay)
+                if not queue:
+                    break
+        except asyncio.CancelledError:
+            for ticket in queue:
+                if not ticket.result.done():
+                    ticket.result.cancel()
+            queue.clear()
+            raise
+        finally:
+            self._workers.pop(key, None)
+            if not queue:
+                self._queues.pop(key, None)
+
+    async def _send(self, head: SendTicket, batch: list[SendTicket]):
+        message = MessageChain(head.message)
+        for ticket in batch[1:]:
+            message.extend([Text("\n"), *ticket.message])  # type: ignore
+        self.coalesced += len(batch) - 1
+        try:
+            res = await head.account.protocol.call_api(
+                Api.MESSAGE_CREATE,
+                {"channel_id": head.channel_id, "content": str(message), "referrer": head.referrer},
+            )
+        except Exception as e:
+            for ticket in batch:
+                if not ticket.result.done():
+                    ticket.result.set_exception(e)
+        else:
+            for ticket in batch:
+                if not ticket.result.done():
+                    ticket.result.set_result((res, message))  # type: ignore
+
+    async def flush(self, account: Account | None = None, channel_id: str | None = None):
+        """等待队列中的消息全部发出
+
+        Args:
+            account: 仅等待该账号的消息，默认为全部账号
+            channel_id: 仅等待该频道的消息，默认为全部频道
+        """
+        pending = [
+            ticket.result
+            for (platform, self_id, channel), queue in self._queues.items()
+            if (account is None or (platform, self_id) == (account.platform, account.self_id))
+            and (channel_id is None or channel == channel_id)
+            for ticket in (*self._sending.get((platform, self_id, channel), ()), *queue)
+        ]
+        if pending:
+            await asyncio.wait(pending)
+
+    async def stop(self, timeout: float | None = 5):
+        if not self._workers:
+            return
+        try:
+            await asyncio.wait_for(self.flush(), timeout)
+        except asyncio.TimeoutError:
+            log.core.warning(f"Outbound queue stopped with <y>{self.depth}</y> messages unsent")
+        tasks = list(self._workers.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+outbound = OutboundQueue()
+"""全局出站消息队列"""
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+from typing import Generic, TypeVar
+
+from satori.model import IterablePageResult, PageResult
+
+T = TypeVar("T")
+
+_END = object()
+
+
+class Readahead(AsyncIterator[T], Generic[T]):
+    """带预读的分页迭代器
+
+    后台任务会在当前页被消费的同时继续请求后续的页，最多预先缓存 `pages` 页。
+    分页接口以上一页返回的 `next` 作为下一页的令牌，因此请求本身仍是依次进行的，
+    但请求的往返时间与调用方处理数据的时间得以重叠。
+
+    迭代提前结束时，应调用 `aclose` (或使用 `async with`) 以取消后台任务。
+
+    Args:
+        source: `Session.guild_member_list` 等方法返回的分页结果
+        pages: 最多预读的页数
+    """
+
+    def __init__(self, source: IterablePageResult[T], pages: int = 2):
+        self.source = source
+        self.pages = max(pages, 1)
+        self._queue: asyncio.Queue[PageResult[T] | Exception | object] = asyncio.Queue(self.pages)
+        self._task: asyncio.Task | None = None
+        self._current: list[T] = []
+        self._index = 0
+        self._done = False
+
+    async def _produce(self):
+        token = self.source.next_page
+        try:
+            while True:
+                page = await self.source.func(token)
+                await self._queue.put(page)
+                token = page.next
+                if not token:
+                    break
+        except Exception as e:
+            await self._queue.put(e)
+            return
+        await self._queue.put(_END)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> T:
+        while self._index >= len(self._current):
+            if self._done:
+                raise StopAsyncIteration
+            if self._task is None:
+                self._task = asyncio.create_task(self._produce())
+            item = await self._queue.get()
+            if item is _END:
+                self._done = True
+                raise StopAsyncIteration
+            if isinstance(item, Exception):
+                self._done = True
+                raise item
+            self._current, self._index = item.data, 0  # type: ignore
+        self._index += 1
+        return self._current[self._index - 1]
+
+    async def aclose(self):
+        self._done = True
+        if self._task and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *_):
+        await self.aclose()
+
+
+def readahead(source: IterablePageResult[T], pages: int = 2) -> Readahead[T]:
+    """以预读的方式迭代分页结果
+
+    Example:
+        >>> async with readahead(session.guild_member_list(), pages=4) as members:
+        ...     async for member in members:
+        ...         ...
+    """
+    return Readahead(source, pages)
+
+
+async def collect_pages(source: IterablePageResult[T], limit: int | None = None, pages: int = 2) -> list[T]:
+    """以预读的方式收集分页结果中的全部条目
+
+    Args:
+        source: 分页结果
+        limit: 最多收集的条目数，达到后停止请求后续的页，为 None 时不限制
+        pages: 最多预读的页数
+    """
+    result: list[T] = []
+    if limit is not None and limit <= 0:
+        return result
+    async with Readahead(source, pages) as it:
+        async for item in it:
+            result.append(item)
+            if limit is not None and len(result) >= limit:
+                break
+    return result
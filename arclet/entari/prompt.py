@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import asyncio
+
+from arclet.letoderea import BLOCK, Scope, Subscriber
+from satori import ChannelType
+from satori.client.account import Account
+from satori.model import Channel, User
+
+from .event.base import MessageCreatedEvent
+from .message import MessageChain
+
+PromptKey = tuple[str, str, "str | None", str]
+"""(platform, self_id, channel_id, user_id)，私聊时 channel_id 为 None"""
+
+
+class PromptRegistry:
+    """`Session.prompt` 的等待者索引
+
+    等待者按 (platform, self_id, channel_id, user_id) 索引，私聊消息按 (platform, self_id, None, user_id) 索引。
+    每组 (priority, block) 只注册一个订阅者，收到消息时直接按键查找对应的等待者，而非逐个检查所有等待者；
+    等待结束 (包括超时) 时等待者按键移除。
+    """
+
+    def __init__(self):
+        self._waiters: dict[tuple[int, bool], dict[PromptKey, dict[int, asyncio.Future[MessageChain]]]] = {}
+        self._subscribers: dict[tuple[int, bool], Subscriber] = {}
+
+    def __len__(self):
+        return len({key for waiters in self._waiters.values() for futs in waiters.values() for key in futs})
+
+    def _dispatcher(self, block: bool, waiters: dict[PromptKey, dict[int, asyncio.Future[MessageChain]]]):
+        async def prompt_dispatch(content: MessageChain, account: Account, channel: Channel, user: User):
+            channel_id = None if channel.type is ChannelType.DIRECT else channel.id
+            if not (futs := waiters.get((account.platform, account.self_id, channel_id, user.id))):
+                return
+            resolved = False
+            for fut in list(futs.values()):
+                if not fut.done():
+                    fut.set_result(content)
+                    resolved = True
+            if resolved and block:
+                return BLOCK
+
+        return prompt_dispatch
+
+    async def wait(
+        self, account: Account, channel: Channel | None, user: User | None, timeout: float, block: bool, priority: int
+    ) -> MessageChain | None:
+        """等待指定用户在指定频道 (或私聊) 中的下一条消息，超时返回 None"""
+        fut: asyncio.Future[MessageChain] = asyncio.get_running_loop().create_future()
+        keys: list[PromptKey] = []
+        if user:
+            keys.append((account.platform, account.self_id, None, user.id))
+            if channel and channel.type is not ChannelType.DIRECT:
+                keys.append((account.platform, account.self_id, channel.id, user.id))
+        group = (priority, block)
+        waiters = self._waiters.setdefault(group, {})
+        for key in keys:
+            waiters.setdefault(key, {})[id(fut)] = fut
+        if keys and group not in self._subscribers:
+            self._subscribers[group] = Scope.root().register(
+                self._dispatcher(block, waiters), MessageCreatedEvent, priority=priority
+            )
+        try:
+            return await asyncio.wait_for(fut, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            for key in keys:
+                if (futs := waiters.get(key)) is not None:
+                    futs.pop(id(fut), None)
+                    if not futs:
+                        del waiters[key]
+            if not waiters:
+                del self._waiters[group]
+                if (sub := self._subscribers.pop(group, None)) is not None:
+                    sub.dispose()
+
+
+prompts = PromptRegistry()
+"""全局的 `Session.prompt` 等待者索引"""
@@ -11,6 +11,7 @@ from launart import Launart, Service, any_completed
 from launart.status import Phase
 
 from .config import BasicConfModel
+from .context import OverlayContexts
 from .event.config import ConfigReload
 from .logger import log
 from .plugin import PluginRole, RootlessPlugin, get_plugin, metadata, plugin_config
@@ -71,7 +72,7 @@ class Scheduler(Service):
                 if self.debug:
                     logger.debug(f"Executing scheduled task: <{task.sub.__repr__()[13:]}")
                 try:
-                    await task.sub.handle(contexts.copy())
+                    await task.sub.handle(OverlayContexts(contexts))
                 except Exception as e:
                     publish_exc_event(
                         ExceptionEvent(
@@ -1,11 +1,11 @@
 import asyncio
 import secrets
-from collections.abc import Awaitable, Callable, Iterable
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
 from typing import Any, Generic, NoReturn, cast, overload
 from typing_extensions import TypeVar
 
 from arclet.letoderea import STOP, defer, es, step_out
-from satori import ChannelType, Quote
+from satori import Quote
 from satori.client.account import Account
 from satori.client.protocol import ApiProtocol
 from satori.const import Api
@@ -25,6 +25,17 @@ from satori.model import (
 )
 
 from . import command
+from .bulk import BroadcastReport, BulkItem, ChannelTarget, bulk_run
+from .cache import (
+    cache_message,
+    forget_channel,
+    forget_member,
+    get_channel,
+    get_guild,
+    get_member,
+    get_message,
+    get_user,
+)
 from .config import EntariConfig
 from .event.base import (
     FriendRequestEvent,
@@ -36,7 +47,13 @@ from .event.base import (
     SatoriEvent,
 )
 from .event.send import SendRequest, SendResponse
+from .event.subscription import has_subscribers
+from .governor import governor
+from .ingress import detach
 from .message import MessageChain, Render
+from .outbound import outbound
+from .prompt import prompts
+from .upload import uploads
 
 TEvent = TypeVar("TEvent", bound=SatoriEvent, default=SatoriEvent)
 T = TypeVar("T")
@@ -44,6 +61,24 @@ T = TypeVar("T")
 COMPONENTS: dict[str, Render["Session", Awaitable[MessageChain]]] = {}
 
 
+def scan_elements(elements: Iterable[Element]) -> tuple[bool, bool]:
+    """遍历一次元素树，返回其中是否包含需要渲染的组件，以及是否包含按钮
+
+    纯文本消息的元素没有子元素，因此只需检查顶层元素的标签。
+    """
+    has_component = has_button = False
+    stack = list(elements)
+    while stack and not (has_component and has_button):
+        elem = stack.pop()
+        if isinstance(elem, Button):
+            has_button = True
+        elif elem.tag == "component" or f"component:{elem.tag}" in COMPONENTS:
+            has_component = True
+        if elem.children:
+            stack.extend(elem.children)
+    return has_component, has_button
+
+
 async def component_transform(session: "Session", content: MessageChain):
     async def rule(elem: Element, sess: "Session"):
         render = elem._attrs.get("is") if elem.tag == "component" else COMPONENTS.get(f"component:{elem.tag}")
@@ -55,7 +90,67 @@ async def component_transform(session: "Session", content: MessageChain):
     return await content.transform_async(rule, session)
 
 
+async def render_message(content: str | Iterable[str | Element], session: "Session | None" = None) -> MessageChain:
+    """将待发送的内容转换为 `MessageChain`，并在提供了会话时渲染其中的组件、为按钮分配 ID"""
+    if isinstance(content, str):
+        msg = (
+            MessageChain(content)
+            if EntariConfig._inited and not EntariConfig.instance.basic.str_as_message
+            else MessageChain.of(content)
+        )
+    else:
+        msg = MessageChain(content)
+    has_component, has_button = scan_elements(msg)
+    if has_component and session:
+        msg = await component_transform(session, msg)
+        has_button = True
+    if has_button:
+        for btn in select(msg, Button):
+            if btn.type != "link" and not btn.id:
+                btn.id = secrets.token_urlsafe(16)
+    return msg
+
+
+async def broadcast(
+    content: str | Iterable[str | Element],
+    targets: Iterable[ChannelTarget],
+    session: "Session | None" = None,
+    concurrency: int = 8,
+    rate: float = 0,
+) -> BroadcastReport:
+    """向多个频道发送同一条消息
+
+    消息只会被渲染一次 (组件需要提供 `session` 才能渲染)，之后以有限的并发向各个频道发送；
+    `rate` 大于 0 时，每个账号每秒最多发送 `rate` 条消息。单个频道的失败不影响其他频道。
+
+    Args:
+        content: 要发送的消息
+        targets: 由 (账号, 频道 ID) 构成的发送目标
+        session: 用于渲染组件的会话
+        concurrency: 最大并发数
+        rate: 每个账号每秒最多发送的消息数，为 0 时不限制
+    """
+    msg = await render_message(content, session)
+    report = BroadcastReport()
+
+    async def send(target: ChannelTarget):
+        account, channel_id = target
+        return await account.protocol.message_create(channel_id, MessageChain(msg))
+
+    async for item in bulk_run(
+        targets, send, concurrency=concurrency, rate=rate, key=lambda t: (t[0].platform, t[0].self_id)
+    ):
+        report.add(item)
+    return report
+
+
 class EntariProtocol(ApiProtocol):
+    async def call_api(
+        self, action: str | Api, params: dict | None = None, multipart: bool = False, method: str = "POST"
+    ) -> dict:
+        call = super().call_api
+        return await governor.call(self.account, action, lambda: call(action, params, multipart, method))
+
     # fmt: off
 
     async def send_message(self, channel: str | Channel, message: str | Iterable[str | Element], at_sender: At | None = None, reply_to: Quote | None = None, referrer: dict[str, Any] | None = None) -> list[MessageObject]:  # noqa: E501
@@ -117,31 +212,55 @@ class EntariProtocol(ApiProtocol):
             msg.insert(0, at_sender)
         if reply_to:
             msg.insert(0, reply_to)
-        sess = None
+        sess = source = None
+        has_component, has_button = scan_elements(msg)
         if referrer and "source" in referrer:
-            sess = Session(self.account, referrer["source"])  # type: ignore
-            msg = await component_transform(sess, msg)
+            source = referrer["source"]
             referrer = {k: v for k, v in referrer.items() if k != "source"}
-            sess.elements = msg
-        btns = select(msg, Button)
-        for btn in btns:
-            if btn.type != "link" and not btn.id:
-                btn.id = secrets.token_urlsafe(16)
-        res = await es.post(ev := SendRequest(self.account, channel_id, msg, sess))
+            if has_component:
+                sess = Session(self.account, source)
+                msg = await component_transform(sess, msg)
+                sess.elements = msg
+                has_button = True
+        if has_button:
+            for btn in select(msg, Button):
+                if btn.type != "link" and not btn.id:
+                    btn.id = secrets.token_urlsafe(16)
+        ev = SendRequest(self.account, channel_id, msg)
+        res = None
+        if has_subscribers(ev):
+            if source and not sess:
+                sess = Session(self.account, source)
+                sess.elements = msg
+            ev.session = sess
+            res = await es.post(ev)
         msg = sess._content if sess and sess._content else ev.message
         if res:
             if res.value is False:
                 return []
             elif isinstance(res.value, MessageChain):
                 msg = res.value
-        send = str(msg)
-        res = await self.call_api(
-            Api.MESSAGE_CREATE,
-            {"channel_id": channel_id, "content": send, "referrer": referrer},
-        )
+        msg = await uploads.rewrite(self.account, msg)
+        # 在预处理完成后才占据队列位置，预处理中嵌套的发送不会等待排在其后的本条消息
+        if ticket := outbound.reserve(self.account, channel_id):
+            res, sent = await outbound.submit(ticket, msg, referrer)
+        else:
+            sent = msg
+            res = await self.call_api(
+                Api.MESSAGE_CREATE,
+                {"channel_id": channel_id, "content": str(msg), "referrer": referrer},
+            )
         res = cast("list[dict]", res)
         resp = [MessageObject.parse(i) for i in res]
-        await es.publish(SendResponse(self.account, channel_id, msg, resp, sess))
+        for mo in resp:
+            if not mo.content and len(resp) == 1:
+                mo = MessageObject.from_elements(mo.id, list(sent), mo.channel, mo.guild, mo.member, mo.user)
+            cache_message(self.account, channel_id, mo, self.account.self_info.user)
+        if has_subscribers(ev := SendResponse(self.account, channel_id, msg, resp, sess)):
+            if source and not sess:
+                ev.session = sess = Session(self.account, source)
+                sess.elements = msg
+            await es.publish(ev)
         return resp
 
     # fmt: on
@@ -156,9 +275,7 @@ class Session(Generic[TEvent]):
         self.referrer = event.referrer or {}
         self.referrer["source"] = self.event
         self.type = event.type
-        self._content = None
-        if isinstance(event, MessageEvent):
-            self._content = MessageChain(event.message.message)
+        self._content: MessageChain | None = None
         self.reply: Reply | None = None
 
     @overload
@@ -233,22 +350,13 @@ class Session(Generic[TEvent]):
         if message:
             await self.send(message)
 
+        detach()
         if handler:
             step = step_out(MessageCreatedEvent, handler, block=block, priority=priority)
+            defer(step.dispose)
+            result = await step.wait(timeout=timeout)
         else:
-
-            async def waiter(content: MessageChain, session: Session[MessageCreatedEvent]):
-                if self.event.user and self.event.user.id == session.event.user.id:
-                    if session.event.channel.type == ChannelType.DIRECT:
-                        return content
-                    if self.event.channel and session.event.channel.id == self.event.channel.id:
-                        return content
-
-            waiter.__annotations__ = {"content": MessageChain, "session": self.__class__}
-
-            step = step_out(MessageCreatedEvent, waiter, block=block, priority=priority)
-        defer(step.dispose)
-        result = await step.wait(timeout=timeout)
+            result = await prompts.wait(self.account, self.event.channel, self.event.user, timeout, block, priority)
         if result is None:
             if timeout_message:
                 await self.send(timeout_message)
@@ -290,7 +398,7 @@ class Session(Generic[TEvent]):
 
     @property
     def content(self) -> str:
-        return str(self._content) or ""
+        return str(self.elements)
 
     @content.setter
     def content(self, value: str):
@@ -298,6 +406,8 @@ class Session(Generic[TEvent]):
 
     @property
     def elements(self) -> MessageChain:
+        if self._content is None and isinstance(self.event, MessageEvent):
+            self._content = self.event.content
         return self._content or MessageChain()
 
     @elements.setter
@@ -375,6 +485,27 @@ class Session(Generic[TEvent]):
 
     # fmt: on
 
+    async def broadcast(
+        self,
+        message: str | Iterable[str | Element],
+        channel_ids: Iterable[str],
+        concurrency: int = 8,
+        rate: float = 0,
+    ) -> BroadcastReport:
+        """使用当前账号向多个频道发送同一条消息，消息中的组件只以当前会话渲染一次
+
+        Args:
+            message: 要发送的消息
+            channel_ids: 要发送的频道 ID
+            concurrency: 最大并发数
+            rate: 每秒最多发送的消息数，为 0 时不限制
+
+        Returns:
+            BroadcastReport: 各频道的发送回执与失败原因
+        """
+        targets = ((self.account, channel_id) for channel_id in channel_ids)
+        return await broadcast(message, targets, self, concurrency, rate)
+
     async def update_message(self, message: str | Iterable[str | Element]):
         """更新消息。
 
@@ -414,7 +545,7 @@ class Session(Generic[TEvent]):
         """
         if not self.event.channel:
             raise RuntimeError("Event has no Channel context!")
-        return await self.account.protocol.message_get(self.event.channel.id, message_id)
+        return await get_message(self.account, self.event.channel.id, message_id)
 
     async def message_delete(self, message_id: str, delay: float = -1) -> None:
         """撤回特定消息。
@@ -473,7 +604,7 @@ class Session(Generic[TEvent]):
         Returns:
             Channel: `Channel` 对象
         """
-        return await self.account.protocol.channel_get(channel_id)
+        return await get_channel(self.account, channel_id)
 
     def channel_list(self, next_token: str | None = None) -> IterablePageResult[Channel]:
         """获取群组中的全部频道。返回一个 Channel 的分页列表。
@@ -499,7 +630,8 @@ class Session(Generic[TEvent]):
         """
         if not self.event.channel:
             raise RuntimeError("Event cannot use to update channel!")
-        return await self.account.protocol.channel_update(self.event.channel.id, data)
+        await self.account.protocol.channel_update(self.event.channel.id, data)
+        forget_channel(self.account, self.event.channel.id)
 
     async def channel_delete(self) -> None:
         """删除群组频道。
@@ -509,7 +641,8 @@ class Session(Generic[TEvent]):
         """
         if not self.event.channel:
             raise RuntimeError("Event cannot use to delete channel!")
-        return await self.account.protocol.channel_delete(self.event.channel.id)
+        await self.account.protocol.channel_delete(self.event.channel.id)
+        forget_channel(self.account, self.event.channel.id)
 
     async def user_channel_create(self, user_id: str | None = None) -> Channel:
         """创建一个私聊频道。返回一个 Channel 对象。
@@ -551,10 +684,10 @@ class Session(Generic[TEvent]):
         if not self.event.guild:
             raise RuntimeError("Event cannot use to get member!")
         if user_id:
-            return await self.account.protocol.guild_member_get(self.event.guild.id, user_id)
+            return await get_member(self.account, self.event.guild.id, user_id)
         if not self.event.user:
             raise RuntimeError("Event cannot use to get member!")
-        return await self.account.protocol.guild_member_get(self.event.guild.id, self.event.user.id)
+        return await get_member(self.account, self.event.guild.id, self.event.user.id)
 
     async def guild_member_kick(self, user_id: str | None = None, permanent: bool = False) -> None:
         """将某个用户踢出群组。
@@ -568,11 +701,31 @@ class Session(Generic[TEvent]):
         """
         if not self.event.guild:
             raise RuntimeError("Event cannot use to kick member!")
-        if user_id:
-            return await self.account.protocol.guild_member_kick(self.event.guild.id, user_id, permanent)
-        if not self.event.user:
+        if not user_id and not self.event.user:
             raise RuntimeError("Event cannot use to kick member!")
-        return await self.account.protocol.guild_member_kick(self.event.guild.id, self.event.user.id, permanent)
+        user_id = user_id or self.event.user.id  # type: ignore
+        await self.account.protocol.guild_member_kick(self.event.guild.id, user_id, permanent)
+        forget_member(self.account, self.event.guild.id, user_id)
+
+    def guild_member_kick_many(
+        self, user_ids: Iterable[str], permanent: bool = False, concurrency: int = 8, rate: float = 0
+    ) -> AsyncIterator[BulkItem[str, None]]:
+        """将多个用户踢出群组，按完成顺序逐个返回每个用户的结果。
+
+        Args:
+            user_ids (Iterable[str]): 用户 ID
+            permanent (bool, optional): 是否永久踢出 (无法再次加入群组)，默认为 False
+            concurrency (int, optional): 最大并发数，默认为 8
+            rate (float, optional): 每秒最多调用的次数，为 0 时不限制
+
+        Returns:
+            AsyncIterator[BulkItem[str, None]]: 每个用户的执行结果
+        """
+        if not self.event.guild:
+            raise RuntimeError("Event cannot use to kick member!")
+        return bulk_run(
+            user_ids, lambda uid: self.guild_member_kick(uid, permanent), concurrency=concurrency, rate=rate
+        )
 
     async def guild_member_role_set(self, role_id: str, user_id: str | None = None) -> None:
         """设置群组内用户的角色。
@@ -586,11 +739,31 @@ class Session(Generic[TEvent]):
         """
         if not self.event.guild:
             raise RuntimeError("Event cannot use to guild member role set!")
-        if user_id:
-            return await self.account.protocol.guild_member_role_set(self.event.guild.id, user_id, role_id)
-        if not self.event.user:
+        if not user_id and not self.event.user:
+            raise RuntimeError("Event cannot use to guild member role set!")
+        user_id = user_id or self.event.user.id  # type: ignore
+        await self.account.protocol.guild_member_role_set(self.event.guild.id, user_id, role_id)
+        forget_member(self.account, self.event.guild.id, user_id)
+
+    def guild_member_role_set_many(
+        self, role_id: str, user_ids: Iterable[str], concurrency: int = 8, rate: float = 0
+    ) -> AsyncIterator[BulkItem[str, None]]:
+        """为群组内的多个用户设置角色，按完成顺序逐个返回每个用户的结果。
+
+        Args:
+            role_id (str): 角色 ID
+            user_ids (Iterable[str]): 用户 ID
+            concurrency (int, optional): 最大并发数，默认为 8
+            rate (float, optional): 每秒最多调用的次数，为 0 时不限制
+
+        Returns:
+            AsyncIterator[BulkItem[str, None]]: 每个用户的执行结果
+        """
+        if not self.event.guild:
             raise RuntimeError("Event cannot use to guild member role set!")
-        return await self.account.protocol.guild_member_role_set(self.event.guild.id, self.event.user.id, role_id)
+        return bulk_run(
+            user_ids, lambda uid: self.guild_member_role_set(role_id, uid), concurrency=concurrency, rate=rate
+        )
 
     async def guild_member_role_unset(self, role_id: str, user_id: str | None = None) -> None:
         """取消群组内用户的角色。
@@ -604,11 +777,31 @@ class Session(Generic[TEvent]):
         """
         if not self.event.guild:
             raise RuntimeError("Event cannot use to guild member role unset!")
-        if user_id:
-            return await self.account.protocol.guild_member_role_unset(self.event.guild.id, user_id, role_id)
-        if not self.event.user:
+        if not user_id and not self.event.user:
             raise RuntimeError("Event cannot use to guild member role unset!")
-        return await self.account.protocol.guild_member_role_unset(self.event.guild.id, self.event.user.id, role_id)
+        user_id = user_id or self.event.user.id  # type: ignore
+        await self.account.protocol.guild_member_role_unset(self.event.guild.id, user_id, role_id)
+        forget_member(self.account, self.event.guild.id, user_id)
+
+    def guild_member_role_unset_many(
+        self, role_id: str, user_ids: Iterable[str], concurrency: int = 8, rate: float = 0
+    ) -> AsyncIterator[BulkItem[str, None]]:
+        """取消群组内多个用户的角色，按完成顺序逐个返回每个用户的结果。
+
+        Args:
+            role_id (str): 角色 ID
+            user_ids (Iterable[str]): 用户 ID
+            concurrency (int, optional): 最大并发数，默认为 8
+            rate (float, optional): 每秒最多调用的次数，为 0 时不限制
+
+        Returns:
+            AsyncIterator[BulkItem[str, None]]: 每个用户的执行结果
+        """
+        if not self.event.guild:
+            raise RuntimeError("Event cannot use to guild member role unset!")
+        return bulk_run(
+            user_ids, lambda uid: self.guild_member_role_unset(role_id, uid), concurrency=concurrency, rate=rate
+        )
 
     def guild_role_list(self, next_token: str | None = None) -> IterablePageResult[Role]:
         """获取群组角色列表。返回一个 Role 的分页列表。
@@ -698,6 +891,35 @@ class Session(Generic[TEvent]):
             raise RuntimeError("Event cannot delete reaction")
         return await self.account.protocol.reaction_delete(self.event.channel.id, message_id or self.event.message.id, emoji_id, user_id)  # type: ignore  # noqa: E501
 
+    def reaction_delete_many(
+        self,
+        emoji_id: str,
+        user_ids: Iterable[str],
+        message_id: str | None = None,
+        concurrency: int = 8,
+        rate: float = 0,
+    ) -> AsyncIterator[BulkItem[str, None]]:
+        """从特定消息删除多个用户添加的特定表态，按完成顺序逐个返回每个用户的结果。
+
+        Args:
+            emoji_id (str): 表情 ID
+            user_ids (Iterable[str]): 用户 ID
+            message_id (str | None, optional): 消息 ID
+            concurrency (int, optional): 最大并发数，默认为 8
+            rate (float, optional): 每秒最多调用的次数，为 0 时不限制
+
+        Returns:
+            AsyncIterator[BulkItem[str, None]]: 每个用户的执行结果
+        """
+        if not self.event.channel:
+            raise RuntimeError("Event cannot be replied to!")
+        if not message_id and not self.event.message:
+            raise RuntimeError("Event cannot delete reaction")
+        message_id = message_id or self.event.message.id  # type: ignore
+        return bulk_run(
+            user_ids, lambda uid: self.reaction_delete(emoji_id, message_id, uid), concurrency=concurrency, rate=rate
+        )
+
     async def reaction_clear(self, emoji_id: str | None = None, message_id: str | None = None) -> None:
         """从特定消息清除某个特定表态。
 
@@ -823,7 +1045,7 @@ class Session(Generic[TEvent]):
         Returns:
             Guild: `Guild` 对象
         """
-        return await self.account.protocol.guild_get(guild_id)
+        return await get_guild(self.account, guild_id)
 
     def guild_list(self, next_token: str | None = None) -> IterablePageResult[Guild]:
         """获取当前用户加入的全部群组。返回一个 Guild 的分页列表。
@@ -852,6 +1074,26 @@ class Session(Generic[TEvent]):
             raise RuntimeError("Event cannot use to mute guild member!")
         return await self.account.protocol.guild_member_mute(self.event.guild.id, user_id, duration)
 
+    def guild_member_mute_many(
+        self, user_ids: Iterable[str], duration: float = 60, concurrency: int = 8, rate: float = 0
+    ) -> AsyncIterator[BulkItem[str, None]]:
+        """禁言多个群组成员，按完成顺序逐个返回每个用户的结果。
+
+        如果传入的禁言时长为 0 则表示解除禁言。
+
+        Args:
+            user_ids (Iterable[str]): 用户 ID
+            duration (float, optional): 禁言时长 (秒)，默认为 60 秒
+            concurrency (int, optional): 最大并发数，默认为 8
+            rate (float, optional): 每秒最多调用的次数，为 0 时不限制
+
+        Returns:
+            AsyncIterator[BulkItem[str, None]]: 每个用户的执行结果
+        """
+        if not self.event.guild:
+            raise RuntimeError("Event cannot use to mute guild member!")
+        return bulk_run(user_ids, lambda uid: self.guild_member_mute(uid, duration), concurrency=concurrency, rate=rate)
+
     async def login_get(self) -> Login:
         """获取当前登录信息。返回一个 `Login` 对象。
 
@@ -869,7 +1111,7 @@ class Session(Generic[TEvent]):
         Returns:
             User: `User` 对象
         """
-        return await self.account.protocol.user_get(user_id)
+        return await get_user(self.account, user_id)
 
     def friend_list(self, next_token: str | None = None) -> IterablePageResult[Friend]:
         """获取好友列表。返回一个 User 的分页列表。
@@ -921,7 +1163,15 @@ class Session(Generic[TEvent]):
 
         如果要发送的消息中含有图片或其他媒体资源，\
             可以使用此 API 将文件上传至 Satori 服务器并转换为 URL，以便在消息编码中使用。
+
+        启用上传缓存时，相同内容的文件只会上传一次。
         """
+        if uploads.enabled:
+            if args and kwargs:
+                raise RuntimeError("upload can't accept both args and kwargs")
+            if args:
+                return await uploads.upload_many(self.account, list(args))
+            return dict(zip(kwargs, await uploads.upload_many(self.account, list(kwargs.values()))))
         return await self.account.protocol.upload_create(*args, **kwargs)
 
     upload = upload_create
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import asyncio
+import copy
+import hashlib
+import json
+import mimetypes
+import time
+from base64 import b64decode
+from os import PathLike
+from pathlib import Path
+from urllib.parse import unquote_to_bytes, urlparse
+from urllib.request import url2pathname
+
+from satori.client.account import Account
+from satori.element import Element, Resource
+from satori.exception import ApiNotAvailable, MethodNotAllowedException
+from satori.model import Upload
+
+from .logger import log
+from .message import MessageChain
+
+UploadKey = tuple[str, str, str]
+"""(sha256, platform, self_id)"""
+
+
+def read_upload(upload: Upload) -> bytes:
+    file = upload.file
+    if isinstance(file, bytes):
+        return file
+    if isinstance(file, PathLike):
+        return Path(file).read_bytes()
+    data = file.read()
+    if hasattr(file, "seek"):
+        file.seek(0)
+    return data
+
+
+def _replace(elem: Element, src: str | None = None, children: list[Element] | None = None):
+    new = copy.copy(elem)
+    new._attrs = dict(elem._attrs)
+    if src is not None:
+        new._attrs["src"] = new.src = src  # type: ignore
+    if children is not None:
+        new._children = children
+    return new
+
+
+def parse_resource(src: str) -> tuple[bytes, str | None] | None:
+    """读取 `data:` URI 或本地文件 (`file:` URI) 的内容与 MIME 类型，其他地址返回 None"""
+    if src.startswith("data:"):
+        header, _, payload = src[5:].partition(",")
+        mime, *params = header.split(";")
+        data = b64decode(payload) if "base64" in params else unquote_to_bytes(payload)
+        return data, mime or None
+    if src.startswith("file:"):
+        path = Path(url2pathname(urlparse(src).path))
+        return path.read_bytes(), mimetypes.guess_type(path.name)[0]
+    return None
+
+
+class UploadCache:
+    """按内容哈希去重的上传缓存
+
+    同一账号上传相同内容的文件时直接复用此前 `upload.create` 返回的地址，
+    记录在过期前一直有效，并持久化于缓存目录中，重启后依然可用。
+    启用后，发送消息前会将内容为 `data:` URI 或本地文件的资源元素上传并替换为缓存的地址。
+
+    Args:
+        enabled: 是否启用
+        ttl: 缓存地址的有效期 (秒)
+    """
+
+    def __init__(self, enabled: bool = False, ttl: float = 86400):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: dict[UploadKey, tuple[float, str]] | None = None
+        self._pending: dict[UploadKey, asyncio.Future[str]] = {}
+        self._unsupported: set[tuple[str, str]] = set()
+
+    def update(self, enabled: bool = False, ttl: float = 86400):
+        self.enabled = enabled
+        self.ttl = ttl
+
+    @property
+    def path(self) -> Path:
+        from .localdata import local_data
+
+        return local_data.get_cache_file("upload", "uploads.json")
+
+    @property
+    def data(self) -> dict[UploadKey, tuple[float, str]]:
+        if self._data is None:
+            self._data = {}
+            try:
+                raw = json.loads(self.path.read_text(encoding="utf-8")) if self.path.exists() else []
+            except (OSError, ValueError) as e:
+                log.core.warning(f"failed to load upload cache: {e!r}")
+                raw = []
+            now = time.time()
+            for digest, platform, self_id, expire, url in raw:
+                if expire > now:
+                    self._data[(digest, platform, self_id)] = (expire, url)
+        return self._data
+
+    def save(self):
+        now = time.time()
+        raw = [[*key, expire, url] for key, (expire, url) in self.data.items() if expire > now]
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(raw), encoding="utf-8")
+        tmp.replace(self.path)
+
+    def get(self, account: Account, digest: str) -> str | None:
+        key = (digest, account.platform, account.self_id)
+        if (item := self.data.get(key)) is None:
+            return None
+        expire, url = item
+        if expire <= time.time():
+            del self.data[key]
+            return None
+        return url
+
+    async def upload(self, account: Account, content: bytes, mimetype: str, name: str | None = None) -> str:
+        """上传文件内容，若该账号已上传过相同内容且未过期则直接返回此前的地址"""
+        key = (hashlib.sha256(content).hexdigest(), account.platform, account.self_id)
+        if url := self.get(account, key[0]):
+            self.hits += 1
+            return url
+        if (fut := self._pending.get(key)) is not None:
+            self.hits += 1
+            return await asyncio.shield(fut)
+        self.misses += 1
+        fut = self._pending[key] = asyncio.get_running_loop().create_future()
+        try:
+            url = (await account.protocol.upload_create(Upload(content, mimetype, name)))[0]
+        except asyncio.CancelledError:
+            fut.cancel()
+            raise
+        except Exception as e:
+            fut.set_exception(e)
+            fut.exception()  # 避免无人等待时的警告
+            raise
+        else:
+            fut.set_result(url)
+            self.data[key] = (time.time() + self.ttl, url)
+            self.save()
+            return url
+        finally:
+            del self._pending[key]
+
+    async def upload_many(self, account: Account, uploads: list[Upload]) -> list[str]:
+        contents = await asyncio.gather(*(asyncio.to_thread(read_upload, upload) for upload in uploads))
+        return list(
+            await asyncio.gather(
+                *(
+                    self.upload(account, content, upload.mimetype, upload.name)
+                    for content, upload in zip(contents, uploads)
+                )
+            )
+        )
+
+    async def _rewrite_resource(self, account: Account, elem: Resource) -> Resource:
+        try:
+            parsed = await asyncio.to_thread(parse_resource, elem.src)
+        except (OSError, ValueError) as e:
+            log.core.debug(f"failed to read resource {elem.src[:64]!r}: {e!r}")
+            return elem
+        if parsed is None:
+            return elem
+        content, mime = parsed
+        try:
+            url = await self.upload(account, content, mime or "application/octet-stream", elem.title)
+        except (ApiNotAvailable, MethodNotAllowedException):
+            self._unsupported.add((account.platform, account.self_id))
+            return elem
+        except Exception as e:
+            log.core.debug(f"failed to upload resource of {account.platform}/{account.self_id}: {e!r}")
+            return elem
+        return _replace(elem, src=url)
+
+    async def _rewrite(self, account: Account, elements: list[Element]) -> list[Element] | None:
+        changed = False
+        result = []
+        for elem in elements:
+            new = elem
+            if isinstance(elem, Resource) and elem.src.startswith(("data:", "file:")):
+                new = await self._rewrite_resource(account, elem)
+            if elem.children and (children := await self._rewrite(account, elem.children)) is not None:
+                new = _replace(new, children=children)
+            changed = changed or new is not elem
+            result.append(new)
+        return result if changed else None
+
+    async def rewrite(self, account: Account, message: MessageChain) -> MessageChain:
+        """将消息中内容为 `data:` URI 或本地文件的资源元素替换为上传后的地址，原消息不会被修改"""
+        if not self.enabled or (account.platform, account.self_id) in self._unsupported:
+            return message
+        if (elements := await self._rewrite(account, list(message))) is None:
+            return message
+        return MessageChain(elements)
+
+
+uploads = UploadCache()
+"""全局上传缓存"""
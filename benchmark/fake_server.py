@@ -0,0 +1,223 @@
+"""用于基准测试的本地 Satori 服务端替身
+
+同时支持 websocket 与 webhook 两种连接方式:
+
+- websocket: 客户端连接 ``/v1/events``，服务端在 IDENTIFY 后下发 READY，并通过该连接推送事件
+- webhook: 客户端先请求 ``/v1/meta`` 获取账号信息，服务端随后向客户端的 webhook 地址推送事件
+
+所有 API 请求 (``POST /v1/{api}``) 都会得到一个最小可用的响应；
+对于 ``message.create``，服务端会记录收到请求的时间，用于统计发送往返延迟。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import time
+from datetime import datetime
+from typing import Any
+
+from aiohttp import ClientSession, WSMsgType, web
+from launart import Launart, Service
+from launart.status import Phase
+from satori import ChannelType, EventType, LoginStatus
+from satori.model import Opcode
+from satori.utils import decode, encode
+from yarl import URL
+
+PLATFORM = "bench"
+SELF_ID = "10000"
+
+
+class FakeSatoriServer(Service):
+    id = "entari.benchmark/fake_server"
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 5140,
+        mode: str = "ws",
+        webhook_url: str | None = None,
+        token: str | None = None,
+        api_delay: float = 0.0,
+    ):
+        super().__init__()
+        self.host = host
+        self.port = port
+        self.mode = mode
+        self.webhook_url = webhook_url
+        self.token = token
+        self.api_delay = api_delay
+        self.connections: list[web.WebSocketResponse] = []
+        self.connected = asyncio.Event()
+        self.api_calls: dict[str, int] = {}
+        self.pushed: dict[int, float] = {}
+        """基准序号 -> 推送时间"""
+        self.replied: dict[int, float] = {}
+        """基准序号 -> 首次收到 message.create 的时间"""
+        self._sn = itertools.count(1)
+        self._msg_id = itertools.count(1)
+        self._session: ClientSession | None = None
+        self._pending: set[asyncio.Task] = set()
+
+    @property
+    def required(self) -> set[str]:
+        return set()
+
+    @property
+    def stages(self) -> set[Phase]:
+        return {"preparing", "blocking", "cleanup"}
+
+    @property
+    def login(self) -> dict[str, Any]:
+        return {
+            "sn": 0,
+            "status": LoginStatus.ONLINE.value,
+            "adapter": "benchmark",
+            "platform": PLATFORM,
+            "user": {"id": SELF_ID, "name": "bench-bot"},
+            "features": ["guild.plain"],
+        }
+
+    async def handle_ws(self, req: web.Request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(req)
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                continue
+            data = decode(msg.data)
+            if data["op"] == Opcode.IDENTIFY:
+                await ws.send_str(
+                    encode({"op": Opcode.READY.value, "body": {"logins": [self.login], "proxy_urls": []}})
+                )
+                self.connections.append(ws)
+                self.connected.set()
+            elif data["op"] == Opcode.PING:
+                await ws.send_str(encode({"op": Opcode.PONG.value, "body": {}}))
+        if ws in self.connections:
+            self.connections.remove(ws)
+        if not self.connections:
+            self.connected.clear()
+        return ws
+
+    async def handle_api(self, req: web.Request):
+        api = req.match_info["api"]
+        self.api_calls[api] = self.api_calls.get(api, 0) + 1
+        if api == "meta":
+            if self.mode == "webhook":
+                self.connected.set()
+            return web.json_response({"logins": [self.login], "proxy_urls": []})
+        body = decode(await req.text() or "{}")
+        if self.api_delay:
+            await asyncio.sleep(self.api_delay)
+        if api == "message.create":
+            referrer = body.get("referrer") or {}
+            if (bench_id := referrer.get("bench_id")) is not None and bench_id not in self.replied:
+                self.replied[bench_id] = time.perf_counter()
+            return web.json_response([{"id": str(next(self._msg_id)), "content": body.get("content", "")}])
+        if api == "message.get":
+            return web.json_response({"id": body.get("message_id", ""), "content": "quoted"})
+        if api == "channel.get":
+            return web.json_response({"id": body.get("channel_id", ""), "type": ChannelType.TEXT.value})
+        if api == "guild.get":
+            return web.json_response({"id": body.get("guild_id", "")})
+        if api == "user.get":
+            return web.json_response({"id": body.get("user_id", "")})
+        if api == "guild.member.get":
+            return web.json_response({"user": {"id": body.get("user_id", "")}})
+        if api == "login.get":
+            return web.json_response(self.login)
+        if api.endswith(".list"):
+            return web.json_response({"data": []})
+        return web.json_response({})
+
+    def make_message(self, bench_id: int, content: str, channel_id: str = "c1", user_id: str = "u1") -> dict:
+        return {
+            "sn": next(self._sn),
+            "type": EventType.MESSAGE_CREATED.value,
+            "timestamp": int(datetime.now().timestamp() * 1000),
+            "login": self.login,
+            "channel": {"id": channel_id, "type": ChannelType.TEXT.value, "name": f"channel-{channel_id}"},
+            "guild": {"id": "g1", "name": "bench-guild"},
+            "user": {"id": user_id, "name": f"user-{user_id}"},
+            "member": {"nick": f"member-{user_id}"},
+            "message": {"id": f"m{bench_id}", "content": content},
+            "referrer": {"bench_id": bench_id},
+        }
+
+    def make_notice(self, bench_id: int, event_type: EventType, user_id: str = "u1") -> dict:
+        body = {
+            "sn": next(self._sn),
+            "type": event_type.value,
+            "timestamp": int(datetime.now().timestamp() * 1000),
+            "login": self.login,
+            "guild": {"id": "g1", "name": "bench-guild"},
+            "user": {"id": user_id},
+            "referrer": {"bench_id": bench_id},
+        }
+        if event_type in (EventType.REACTION_ADDED, EventType.REACTION_REMOVED):
+            body["channel"] = {"id": "c1", "type": ChannelType.TEXT.value}
+            body["message"] = {"id": f"m{bench_id}", "content": ""}
+            body["emoji"] = {"id": "1", "name": "thumbs"}
+        elif event_type in (EventType.GUILD_MEMBER_UPDATED, EventType.GUILD_MEMBER_ADDED):
+            body["member"] = {"nick": f"member-{user_id}"}
+        return body
+
+    async def wait_ready(self):
+        """等待客户端可以接收事件"""
+        await self.connected.wait()
+        if self.mode != "webhook":
+            return
+        # webhook 客户端在获取 meta 之后才会启动自身的服务器
+        url = URL(self.webhook_url)
+        while True:
+            try:
+                _, writer = await asyncio.open_connection(url.host, url.port)
+            except OSError:
+                await asyncio.sleep(0.05)
+            else:
+                writer.close()
+                await writer.wait_closed()
+                return
+
+    async def _post(self, body: dict):
+        assert self._session and self.webhook_url
+        headers = {"Authorization": f"Bearer {self.token or ''}", "Satori-OpCode": str(Opcode.EVENT.value)}
+        async with self._session.post(self.webhook_url, data=encode(body), headers=headers) as resp:
+            await resp.read()
+
+    async def push(self, bench_id: int, body: dict):
+        self.pushed[bench_id] = time.perf_counter()
+        if self.mode == "webhook":
+            # 不等待响应，避免推送速率受限于单个请求的往返时间
+            task = asyncio.create_task(self._post(body))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+            return
+        payload = encode({"op": Opcode.EVENT.value, "body": body})
+        for ws in self.connections:
+            await ws.send_str(payload)
+
+    async def launch(self, manager: Launart):
+        async with self.stage("preparing"):
+            app = web.Application()
+            app.router.add_get("/v1/events", self.handle_ws)
+            app.router.add_post("/v1/{api}", self.handle_api)
+            runner = web.AppRunner(app)
+            await runner.setup()
+            site = web.TCPSite(runner, self.host, self.port)
+            await site.start()
+            if self.mode == "webhook":
+                self._session = ClientSession()
+
+        async with self.stage("blocking"):
+            await manager.status.wait_for_sigexit()
+
+        async with self.stage("cleanup"):
+            for ws in list(self.connections):
+                await ws.close()
+            if self._pending:
+                await asyncio.wait(self._pending)
+            if self._session:
+                await self._session.close()
+            await runner.cleanup()
@@ -0,0 +1,313 @@
+"""Entari 端到端吞吐基准测试
+
+启动一个本地 Satori 服务端替身，以受控速率推送 ``message-created`` 与通知事件，
+经过 ``event_parse`` -> ``le.publish`` -> ``Session.send`` -> ``EntariProtocol.message_create`` 全链路，
+最后报告事件吞吐、处理延迟 (p50/p99)、发送往返延迟与内存占用。
+
+用法::
+
+    python benchmark/run.py --mode ws --events 5000 --rate 1000 --commands 200
+    python benchmark/run.py --mode webhook --events 2000 --rate 0 --notice-ratio 0.3
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from creart import it
+from launart import Launart, Service
+from launart.status import Phase
+from satori import EventType
+from satori.client import Account, WebhookInfo, WebsocketsInfo
+from satori.model import Event
+
+from arclet.entari import Entari, command, plugin_config
+from arclet.entari.config import BasicConfModel, EntariConfig, model_field
+from arclet.entari.plugin import RootlessPlugin
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from fake_server import FakeSatoriServer  # noqa: E402
+
+TOKEN = "entari-benchmark"
+NOTICE_TYPES = (EventType.GUILD_MEMBER_UPDATED, EventType.REACTION_ADDED)
+
+
+class BenchCommandsConfig(BasicConfModel):
+    count: int = model_field(default=0, description="注册的测试命令数量")
+
+
+@RootlessPlugin.apply("bench_commands")
+def bench_commands(plg: RootlessPlugin):
+    conf = plugin_config(BenchCommandsConfig)
+
+    for i in range(conf.count):
+
+        @command.on(f"bench{i} {{value}}")
+        async def bench(value: str, index: int = i):
+            return f"bench{index}: {value}"
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = (len(values) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (k - lo)
+
+
+def rss_mb() -> tuple[float, float]:
+    """返回 (当前 RSS, 峰值 RSS)，单位为 MiB"""
+    current = peak = 0.0
+    try:
+        with open("/proc/self/statm") as f:
+            current = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        peak = peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        pass
+    return current, peak
+
+
+class BenchEntari(Entari):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies: list[float] = []
+        self.handled = 0
+        self.all_handled = asyncio.Event()
+        self.expected = -1
+        self._received: dict[int, float] = {}
+
+    async def handle_event(self, account: Account, event: Event):
+        if event.referrer and "bench_id" in event.referrer:
+            self._received[event.referrer["bench_id"]] = time.perf_counter()
+        await super().handle_event(account, event)
+
+    async def process_event(self, account: Account, event: Event):
+        try:
+            await super().process_event(account, event)
+        finally:
+            if event.referrer and "bench_id" in event.referrer:
+                start = self._received.pop(event.referrer["bench_id"], None)
+                if start is not None:
+                    self.latencies.append(time.perf_counter() - start)
+                self.handled += 1
+                if self.expected >= 0 and self.handled + self.shed_total >= self.expected:
+                    self.all_handled.set()
+
+    @property
+    def shed_total(self) -> int:
+        """被入口队列丢弃或合并的事件数量"""
+        ingress = self.ingress
+        return ingress.dropped + sum(ingress.shed.values()) + sum(ingress.coalesced.values())
+
+
+class BenchDriver(Service):
+    id = "entari.benchmark/driver"
+
+    def __init__(self, app: BenchEntari, server: FakeSatoriServer, args: argparse.Namespace):
+        super().__init__()
+        self.app = app
+        self.server = server
+        self.args = args
+        self.report: dict | None = None
+
+    @property
+    def required(self) -> set[str]:
+        return {FakeSatoriServer.id}
+
+    @property
+    def stages(self) -> set[Phase]:
+        return {"blocking"}
+
+    def build(self, bench_id: int, rng: random.Random) -> dict:
+        args = self.args
+        if rng.random() < args.notice_ratio:
+            return self.server.make_notice(bench_id, rng.choice(NOTICE_TYPES), f"u{rng.randrange(args.users)}")
+        roll = rng.random()
+        if roll < 0.4:
+            content = f"{args.prefix}echo {bench_id}"
+        elif roll < 0.5:
+            content = f"{args.prefix}help"
+        elif roll < 0.8 and args.commands:
+            content = f"{args.prefix}bench{rng.randrange(args.commands)} {bench_id}"
+        else:
+            content = f"plain message {bench_id}"
+        return self.server.make_message(
+            bench_id, content, f"c{rng.randrange(args.channels)}", f"u{rng.randrange(args.users)}"
+        )
+
+    async def launch(self, manager: Launart):
+        async with self.stage("blocking"):
+            args = self.args
+            await self.server.wait_ready()
+            while not self.app.accounts:
+                await asyncio.sleep(0.05)
+            rng = random.Random(args.seed)
+            bodies = [self.build(i, rng) for i in range(args.warmup + args.events)]
+            for i in range(args.warmup):
+                await self.server.push(i, bodies[i])
+            await asyncio.sleep(0.5)
+            self.app.latencies.clear()
+            self.server.pushed.clear()
+            self.server.replied.clear()
+            self.server.api_calls.clear()
+            self.app.handled = 0
+            self.app.ingress.dropped = 0
+            self.app.ingress.shed.clear()
+            self.app.ingress.coalesced.clear()
+            self.app.expected = args.events
+
+            interval = 1 / args.rate if args.rate > 0 else 0
+            start = time.perf_counter()
+            for n, i in enumerate(range(args.warmup, args.warmup + args.events)):
+                if interval and (delay := start + n * interval - time.perf_counter()) > 0:
+                    await asyncio.sleep(delay)
+                await self.server.push(i, bodies[i])
+            pushed = time.perf_counter()
+            try:
+                await asyncio.wait_for(self.app.all_handled.wait(), args.timeout)
+            except asyncio.TimeoutError:
+                pass
+            elapsed = time.perf_counter() - start
+            await asyncio.sleep(0.2)
+
+            rtt = [
+                self.server.replied[k] - self.server.pushed[k] for k in self.server.replied if k in self.server.pushed
+            ]
+            current, peak = rss_mb()
+            self.report = {
+                "mode": args.mode,
+                "events": args.events,
+                "handled": self.app.handled,
+                "workers": args.workers,
+                "ordered": args.ordered,
+                "dropped": self.app.ingress.dropped,
+                "shed": dict(self.app.ingress.shed),
+                "coalesced": dict(self.app.ingress.coalesced),
+                "commands": args.commands,
+                "rate_target": args.rate,
+                "push_seconds": round(pushed - start, 4),
+                "elapsed_seconds": round(elapsed, 4),
+                "events_per_sec": round(self.app.handled / elapsed, 2) if elapsed else 0.0,
+                "handler_p50_ms": round(percentile(self.app.latencies, 50) * 1000, 3),
+                "handler_p99_ms": round(percentile(self.app.latencies, 99) * 1000, 3),
+                "send_rtt_count": len(rtt),
+                "send_rtt_p50_ms": round(percentile(rtt, 50) * 1000, 3),
+                "send_rtt_p99_ms": round(percentile(rtt, 99) * 1000, 3),
+                "rss_mb": round(current, 2),
+                "peak_rss_mb": round(peak, 2),
+                "api_calls": dict(self.server.api_calls),
+            }
+            # 与 Launart 处理 SIGINT 的方式一致，以便 sideload 的组件 (网络连接、调度器等) 也能退出
+            manager.status.exiting = True
+            if manager.task_group is not None:
+                manager.task_group.stop = True
+                if manager.task_group.blocking_task is not None:
+                    manager.task_group.blocking_task.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Entari 端到端吞吐基准测试")
+    parser.add_argument("--mode", choices=("ws", "webhook"), default="ws", help="连接方式")
+    parser.add_argument("--events", type=int, default=2000, help="计入统计的事件数量")
+    parser.add_argument("--warmup", type=int, default=100, help="预热事件数量")
+    parser.add_argument("--rate", type=float, default=0, help="推送速率 (事件/秒)，0 表示不限速")
+    parser.add_argument("--commands", type=int, default=50, help="额外注册的测试命令数量")
+    parser.add_argument("--notice-ratio", type=float, default=0.2, help="通知事件所占比例")
+    parser.add_argument("--channels", type=int, default=8, help="消息分布的频道数量")
+    parser.add_argument("--users", type=int, default=32, help="消息分布的用户数量")
+    parser.add_argument("--prefix", default="/", help="命令前缀")
+    parser.add_argument("--workers", type=int, default=0, help="事件入口队列的 worker 数量，0 表示直接处理")
+    parser.add_argument("--queue-size", type=int, default=1024, help="事件入口队列的最大长度")
+    parser.add_argument(
+        "--overflow", choices=("block", "drop_new", "drop_oldest"), default="block", help="事件入口队列溢出策略"
+    )
+    parser.add_argument("--port", type=int, default=15140, help="服务端替身端口")
+    parser.add_argument("--webhook-port", type=int, default=18080, help="webhook 模式下客户端监听端口")
+    parser.add_argument("--api-delay", type=float, default=0.0, help="服务端替身对每个 API 请求附加的延迟 (秒)")
+    parser.add_argument("--timeout", type=float, default=60, help="等待事件处理完毕的最长时间 (秒)")
+    parser.add_argument("--ordered", action="store_true", help="按频道保序处理事件")
+    parser.add_argument("--shed-latency", type=float, default=0, help="低优先级事件的排队延迟阈值 (秒)")
+    parser.add_argument("--shed-policy", choices=("drop", "coalesce"), default="drop", help="低优先级事件的降载策略")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--log-level", default="WARNING", help="Entari 日志级别")
+    parser.add_argument("--json", action="store_true", help="以 JSON 格式输出报告")
+    args = parser.parse_args()
+
+    if args.mode == "ws":
+        network = WebsocketsInfo(host="127.0.0.1", port=args.port, token=TOKEN)
+        webhook_url = None
+    else:
+        network = WebhookInfo(
+            host="127.0.0.1", port=args.webhook_port, token=TOKEN, server_host="127.0.0.1", server_port=args.port
+        )
+        webhook_url = f"http://127.0.0.1:{args.webhook_port}{network.path}"
+
+    workdir = tempfile.TemporaryDirectory(prefix="entari_bench_")
+    config_path = Path(workdir.name) / "entari.json"
+    config_path.write_text(
+        json.dumps(
+            {
+                "basic": {
+                    "log": {"level": args.log_level},
+                    "prefix": [args.prefix],
+                    "ingress": {
+                        "workers": args.workers,
+                        "queue_size": args.queue_size,
+                        "overflow": args.overflow,
+                        "ordered": args.ordered,
+                        "shed_latency": args.shed_latency,
+                        "shed_policy": args.shed_policy,
+                    },
+                },
+                "plugins": {
+                    "::echo": {},
+                    "::help": {"page_size": None},
+                    ".bench_commands": {"count": args.commands},
+                    ".localdata": {"base_dir": workdir.name},
+                },
+            }
+        ),
+        encoding="utf-8",
+    )
+    EntariConfig.load(config_path)
+
+    server = FakeSatoriServer("127.0.0.1", args.port, args.mode, webhook_url, TOKEN, api_delay=args.api_delay)
+    app = BenchEntari(network, log_level=args.log_level)
+    driver = BenchDriver(app, server, args)
+    manager = it(Launart)
+    manager.add_component(server)
+    manager.add_component(driver)
+    app.run(manager)
+    config_path.unlink(missing_ok=True)
+    workdir.cleanup()
+
+    if driver.report is None:
+        print("benchmark did not complete", file=sys.stderr)
+        sys.exit(1)
+    if args.json:
+        print(json.dumps(driver.report, ensure_ascii=False, indent=2))
+        return
+    width = max(len(k) for k in driver.report)
+    for key, value in driver.report.items():
+        print(f"{key:<{width}} : {value}")
+
+
+if __name__ == "__main__":
+    main()
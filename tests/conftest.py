@@ -0,0 +1,74 @@
+import asyncio
+import json
+from itertools import count
+from types import SimpleNamespace
+
+import pytest
+from creart import it
+from satori import ChannelType, EventType
+from satori.const import Api
+from satori.model import Event, User
+
+from arclet.entari.config import EntariConfig
+from arclet.entari.event.base import event_parse
+from arclet.entari.session import EntariProtocol
+
+SELF_ID = "10000"
+_sn = count(1)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def config(tmp_path_factory):
+    path = tmp_path_factory.mktemp("entari") / "entari.json"
+    path.write_text(json.dumps({"basic": {"prefix": ["/"]}}), encoding="utf-8")
+    return EntariConfig.load(path)
+
+
+@pytest.fixture
+def run():
+    """在 Entari 使用的事件循环上运行协程"""
+    return it(asyncio.AbstractEventLoop).run_until_complete
+
+
+@pytest.fixture
+def account():
+    return SimpleNamespace(self_id=SELF_ID, platform="test", protocol=None)
+
+
+@pytest.fixture
+def message_event(account):
+    def factory(content: str, channel_id: str = "c1", user_id: str = "u1"):
+        sn = next(_sn)
+        raw = {
+            "sn": sn,
+            "type": EventType.MESSAGE_CREATED.value,
+            "timestamp": 0,
+            "login": {"sn": 0, "status": 1, "platform": "test", "user": {"id": SELF_ID}},
+            "channel": {"id": channel_id, "type": ChannelType.TEXT.value},
+            "user": {"id": user_id},
+            "message": {"id": f"m{sn}", "content": content},
+        }
+        return event_parse(account, Event.parse(raw))
+
+    return factory
+
+
+class FakeProtocol(EntariProtocol):
+    def __init__(self, account):
+        self.account = account
+        self.sent: list[str] = []
+
+    async def call_api(self, action, params=None, multipart=False, method="POST"):
+        await asyncio.sleep(0)
+        if action is Api.CHANNEL_GET:
+            return {"id": params["channel_id"], "type": 0}
+        self.sent.append(params["content"])
+        return [{"id": f"s{len(self.sent)}", "content": params["content"]}]
+
+
+@pytest.fixture
+def fake_account():
+    """通过 `EntariProtocol` 发送、记录发出内容而不访问网络的账号"""
+    account = SimpleNamespace(platform="test", self_id="10000", self_info=SimpleNamespace(user=User("10000")))
+    account.protocol = FakeProtocol(account)
+    return account
@@ -0,0 +1,89 @@
+import asyncio
+import time
+from contextlib import aclosing
+from types import SimpleNamespace
+
+from arclet.entari.bulk import bulk_run
+from arclet.entari.session import broadcast
+
+
+class CountingProtocol:
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self.sent: list[tuple[str, str]] = []
+
+    async def message_create(self, channel_id, content):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(0.01)
+            if channel_id == "bad":
+                raise RuntimeError("boom")
+            self.sent.append((channel_id, str(content)))
+            return [channel_id]
+        finally:
+            self.active -= 1
+
+
+def counting_account(self_id: str = "10000"):
+    return SimpleNamespace(platform="test", self_id=self_id, protocol=CountingProtocol())
+
+
+def test_broadcast_reports_each_channel(run):
+    account = counting_account()
+    targets = [(account, f"c{i}") for i in range(6)] + [(account, "bad")]
+    report = run(broadcast("hello", targets, concurrency=3))
+    assert (report.succeeded, report.failed) == (6, 1)
+    assert isinstance(report.failures[("test", "10000", "bad")], RuntimeError)
+    assert report.receipts[("test", "10000", "c0")] == ["c0"]
+    assert account.protocol.peak == 3
+    assert {content for _, content in account.protocol.sent} == {"hello"}
+
+
+def test_bulk_run_rate_limited_per_key(run):
+    started: dict[str, list[float]] = {"a": [], "b": []}
+
+    async def work(target):
+        started[target[0]].append(time.monotonic())
+        return target
+
+    async def main():
+        return [item async for item in bulk_run(["a1", "a2", "a3", "b1", "b2"], work, rate=20, key=lambda t: t[0])]
+
+    items = run(main())
+    assert sorted(item.result for item in items) == ["a1", "a2", "a3", "b1", "b2"]
+    # 同一键下相邻两次调用至少间隔 1 / rate，不同键互不影响
+    gaps = [later - earlier for earlier, later in zip(started["a"], started["a"][1:])]
+    assert all(gap >= 0.045 for gap in gaps)
+    assert started["b"][0] - started["a"][0] < 0.03
+
+
+def test_bulk_run_records_errors_and_stops_early(run):
+    started = []
+
+    async def work(target):
+        started.append(target)
+        await asyncio.sleep(0)
+        if target == 1:
+            raise ValueError(target)
+        return target * 2
+
+    async def main():
+        items = []
+        async with aclosing(bulk_run(range(100), work, concurrency=2)) as results:
+            async for item in results:
+                items.append(item)
+                if len(items) == 4:
+                    break
+        count = len(started)
+        await asyncio.sleep(0.01)
+        # 结束迭代后不再执行尚未开始的目标
+        assert len(started) == count < 100
+        return items
+
+    items = run(main())
+    failed = [item for item in items if not item.ok]
+    assert [item.target for item in failed] == [1]
+    assert isinstance(failed[0].error, ValueError)
+    assert all(item.result == item.target * 2 for item in items if item.ok)
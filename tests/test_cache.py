@@ -0,0 +1,96 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from satori import EventType
+from satori.model import Event, MessageObject
+
+from arclet.entari.cache import TTLCache, get_message, message_cache, record_event
+
+
+def test_get_or_fetch_single_flight(run):
+    cache = TTLCache()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def main():
+        return await asyncio.gather(*(cache.get_or_fetch("key", fetch) for _ in range(3)))
+
+    assert run(main()) == ["value"] * 3
+    assert calls == [1]
+    assert (cache.misses, cache.hits) == (1, 2)
+    assert cache.get("key") == "value"
+
+
+def test_get_or_fetch_error_not_cached(run):
+    cache = TTLCache()
+    attempts = []
+
+    async def fetch():
+        attempts.append(1)
+        await asyncio.sleep(0)
+        if len(attempts) == 1:
+            raise ValueError("boom")
+        return "value"
+
+    async def main():
+        results = await asyncio.gather(
+            cache.get_or_fetch("key", fetch), cache.get_or_fetch("key", fetch), return_exceptions=True
+        )
+        assert all(isinstance(res, ValueError) for res in results)
+        return await cache.get_or_fetch("key", fetch)
+
+    assert run(main()) == "value"
+    assert len(attempts) == 2
+
+
+def test_expiry_and_capacity():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    cache.set("d", 4, ttl=-1)
+    assert "d" not in cache
+
+
+def test_quoted_message_served_from_cache(run):
+    fetched = []
+
+    async def message_get(channel_id, message_id):
+        fetched.append(message_id)
+        return MessageObject(message_id, "fetched")
+
+    acc = SimpleNamespace(self_id="10000", platform="test", protocol=SimpleNamespace(message_get=message_get))
+    raw = {
+        "sn": 1,
+        "type": EventType.MESSAGE_CREATED.value,
+        "timestamp": 0,
+        "login": {"sn": 0, "status": 1, "platform": "test", "user": {"id": "10000"}},
+        "channel": {"id": "c1", "type": 0},
+        "user": {"id": "u1"},
+        "message": {"id": "cached", "content": "hello"},
+    }
+    record_event(acc, Event.parse(raw))
+    try:
+        assert run(get_message(acc, "c1", "cached")).content == "hello"
+        assert run(get_message(acc, "c1", "other")).content == "fetched"
+        assert fetched == ["other"]
+        raw.update(type=EventType.MESSAGE_DELETED.value)
+        record_event(acc, Event.parse(raw))
+        assert run(get_message(acc, "c1", "cached")).content == "fetched"
+    finally:
+        message_cache.clear()
+
+
+@pytest.mark.parametrize("maxsize, ttl", [(0, 60), (10, 0)])
+def test_disabled_cache(maxsize, ttl):
+    cache = TTLCache(maxsize=maxsize, ttl=ttl)
+    cache.set("a", 1)
+    assert len(cache) == 0
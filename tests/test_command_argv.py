@@ -0,0 +1,36 @@
+from arclet.alconna import Alconna, Args
+
+from arclet.entari import MessageChain
+from arclet.entari.command.argv import MessageArgv, TokenCache, token_cache
+
+
+def test_tokens_shared_between_commands(monkeypatch):
+    cache = TokenCache()
+    monkeypatch.setattr("arclet.entari.command.argv.token_cache", cache)
+    first = Alconna("echo", Args["text", str])
+    second = Alconna("echo", Args["word", str])
+    message = MessageChain("echo hello")
+    with cache.scope({}):
+        assert first.parse(message).query("text") == "hello"
+        assert second.parse(message).query("word") == "hello"
+    assert (cache.misses, cache.event_hits) == (1, 1)
+    with cache.scope({}):
+        assert first.parse(MessageChain("echo hello")).query("text") == "hello"
+    assert cache.global_hits == 1
+
+
+def test_token_sig_computed_on_compile(monkeypatch):
+    calls = []
+    original = MessageArgv._update_token_sig
+
+    def update(self):
+        calls.append(self)
+        original(self)
+
+    monkeypatch.setattr(MessageArgv, "_update_token_sig", update)
+    cmd = Alconna("sig")
+    calls.clear()
+    with token_cache.scope({}):
+        for _ in range(3):
+            cmd.parse(MessageChain("sig"))
+    assert calls == []
@@ -0,0 +1,85 @@
+from arclet.alconna import Alconna, Args, CommandMeta
+from arclet.letoderea import on, publish
+
+from arclet.entari import command
+from arclet.entari.command.index import CommandIndex
+from arclet.entari.event.command import CommandReceive
+from arclet.entari.plugin import RootlessPlugin, load_plugin
+
+
+def test_fuzzy_match_command_in_fallback():
+    index = CommandIndex()
+    index.add("exact", Alconna("exact_cmd"))
+    index.add("fuzzy", Alconna("fuzzy_cmd", meta=CommandMeta(fuzzy_match=True)))
+    assert list(index.route("exact_cmd")) == ["exact", "fuzzy"]
+    assert list(index.route("fuzy_cmd")) == ["fuzzy"]
+
+
+def test_fuzzy_match_receives_misspelled_command(run, message_event):
+    received = []
+
+    def plugin(plg: RootlessPlugin):
+        for cmd in (Alconna("weather", meta=CommandMeta(fuzzy_match=True)), Alconna("forecast")):
+            disp = command.mount(cmd)
+
+            @disp.handle
+            async def handler():
+                pass
+
+    @on(CommandReceive)
+    async def receive(cmd: Alconna):
+        received.append(cmd.name)
+
+    plg = RootlessPlugin(".test_fuzzy_match", plugin, {})
+    try:
+        run(publish(message_event("/waether")))
+    finally:
+        receive.dispose()
+        plg.dispose()
+    assert received == ["weather"]
+
+
+def test_shortcut_added_after_indexing(run, message_event):
+    got = []
+    cmd = Alconna("greet", Args["name", str])
+
+    def plugin(plg: RootlessPlugin):
+        disp = command.mount(cmd)
+
+        @disp.handle
+        async def greet(name: str):
+            got.append(name)
+
+    plg = RootlessPlugin(".test_shortcut_route", plugin, {})
+    try:
+        run(publish(message_event("/greet alice")))
+        cmd.shortcut("hello", {"command": "greet bob"})
+        run(publish(message_event("/hello")))
+    finally:
+        plg.dispose()
+    assert got == ["alice", "bob"]
+
+
+def test_fuzzy_match_string_command(run, message_event):
+    load_plugin(".commands")
+    received = []
+
+    @command.on("rainfall", meta=CommandMeta(fuzzy_match=True))
+    async def rainfall():
+        pass
+
+    @command.on("sunshine")
+    async def sunshine():
+        pass
+
+    @on(CommandReceive)
+    async def receive(cmd: Alconna):
+        received.append(cmd.name)
+
+    try:
+        run(publish(message_event("/rianfall")))
+    finally:
+        receive.dispose()
+        rainfall.dispose()
+        sunshine.dispose()
+    assert received == ["rainfall"]
@@ -0,0 +1,75 @@
+import asyncio
+
+from arclet.alconna import Alconna
+from arclet.letoderea import on, publish
+
+from arclet.entari import MessageCreatedEvent, Session, command
+from arclet.entari.outbound import outbound
+from arclet.entari.plugin import RootlessPlugin
+
+
+def test_mount_notice_and_reply_me(run, message_event):
+    got = []
+
+    def plugin(plg: RootlessPlugin):
+        ping = command.mount(Alconna("ping"), need_notice_me=True)
+
+        @ping.handle
+        async def on_ping():
+            got.append("ping")
+
+        pong = command.mount(Alconna("pong"), need_reply_me=True)
+
+        @pong.handle
+        async def on_pong():
+            got.append("pong")
+
+    plg = RootlessPlugin(".test_mount_notice", plugin, {})
+
+    # 同一事件上的其他订阅者不应影响挂载命令对提及与回复的判断
+    @on(MessageCreatedEvent)
+    async def other():
+        pass
+
+    try:
+        for content in (
+            '<at id="10000"/> /ping',
+            "/ping",
+            '<quote id="q1"><author id="10000"/>hi</quote>/pong',
+            '<quote id="q2"><author id="20000"/>hi</quote>/pong',
+            "/pong",
+        ):
+            run(publish(message_event(content)))
+    finally:
+        other.dispose()
+        plg.dispose()
+    assert got == ["ping", "pong"]
+
+
+def test_mount_streaming_uses_outbound_queue(run, message_event, monkeypatch):
+    events = []
+
+    async def send(self, message, *args, **kwargs):
+        events.append(f"start {message}")
+        await asyncio.sleep(0.01)
+        events.append(f"end {message}")
+
+    monkeypatch.setattr(Session, "send", send)
+
+    def plugin(plg: RootlessPlugin):
+        disp = command.mount(Alconna("stream")).as_execute()
+
+        @disp.handle
+        async def stream():
+            yield "a"
+            yield "b"
+
+    plg = RootlessPlugin(".test_mount_streaming", plugin, {})
+    outbound.update(coalesce_window=0.05)
+    try:
+        run(publish(message_event("/stream")))
+    finally:
+        outbound.update()
+        plg.dispose()
+    # 启用出站队列时不逐条等待发送，连续的消息得以进入队列合并
+    assert events == ["start a", "start b", "end a", "end b"]
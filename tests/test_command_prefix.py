@@ -0,0 +1,54 @@
+from arclet.alconna import Alconna
+from arclet.letoderea import publish
+from satori import Text
+
+from arclet.entari import MessageChain, command
+from arclet.entari.command.provider import PrefixMatcher
+from arclet.entari.plugin import RootlessPlugin
+
+
+def test_first_configured_prefix_wins():
+    assert PrefixMatcher(["!", "!!"], "").strip_text("!!cmd") == "!cmd"
+    assert PrefixMatcher(["!!", "!"], "").strip_text("!!cmd") == "cmd"
+    assert PrefixMatcher(["/"], "").strip_text("cmd") is None
+    assert PrefixMatcher(["/", ""], "").strip_text("cmd") == "cmd"
+    assert PrefixMatcher(["/"], "bot").strip_text("@bot, cmd") == "cmd"
+
+
+def test_strip_result():
+    matcher = PrefixMatcher(["/"], "")
+    message = MessageChain([Text("/cmd arg")])
+    result = matcher.strip(message)
+    assert (str(result.message), result.need_skip) == ("cmd arg", False)
+    assert str(message) == "/cmd arg"
+    result = matcher.strip(MessageChain([Text("cmd")]))
+    assert (str(result.message), result.need_skip) == ("cmd", True)
+
+
+def test_prefix_stripped_once_per_event(run, message_event, monkeypatch):
+    calls = []
+    got = []
+    strip = PrefixMatcher.strip
+
+    def counting(self, message):
+        calls.append(str(message))
+        return strip(self, message)
+
+    monkeypatch.setattr(PrefixMatcher, "strip", counting)
+
+    def plugin(plg: RootlessPlugin):
+        # 同名的命令都会被路由到，各自的 judge 共用一次去除前缀的结果
+        for _ in range(3):
+            disp = command.mount(Alconna("beta"))
+
+            @disp.handle
+            async def handler(cmd: Alconna):
+                got.append(cmd.name)
+
+    plg = RootlessPlugin(".test_prefix_once", plugin, {})
+    try:
+        run(publish(message_event("/beta")))
+    finally:
+        plg.dispose()
+    assert got == ["beta"] * 3
+    assert calls == ["/beta"]
@@ -0,0 +1,48 @@
+import pytest
+
+from arclet.entari.context import OverlayContexts
+
+
+def test_reads_fall_back_to_parent():
+    parent = {"a": 1, "b": 2}
+    ctx = OverlayContexts(parent)
+    assert ctx["a"] == 1
+    assert ctx.get("missing", 0) == 0
+    assert "b" in ctx
+    assert dict(ctx.items()) == parent
+    with pytest.raises(KeyError):
+        ctx["missing"]
+
+
+def test_writes_do_not_touch_parent():
+    parent = {"a": 1, "b": 2}
+    ctx = OverlayContexts(parent)
+    ctx["a"] = 10
+    ctx.update(c=3)
+    del ctx["b"]
+    assert ctx.materialize() == {"a": 10, "c": 3}
+    assert "b" not in ctx
+    assert ctx.pop("b", None) is None
+    assert parent == {"a": 1, "b": 2}
+    ctx["b"] = 20
+    assert ctx == {"a": 10, "b": 20, "c": 3}
+
+
+def test_siblings_are_isolated():
+    parent = {"a": 1}
+    first, second = OverlayContexts(parent), OverlayContexts(parent)
+    first["x"] = 1
+    second.pop("a")
+    assert "x" not in second
+    assert first["a"] == 1
+    assert "a" not in second
+
+
+def test_copy_keeps_snapshot():
+    ctx = OverlayContexts({"a": 1})
+    ctx["b"] = 2
+    copied = ctx.copy()
+    copied["b"] = 3
+    copied.pop("a")
+    assert ctx.materialize() == {"a": 1, "b": 2}
+    assert copied.materialize() == {"b": 3}
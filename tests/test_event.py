@@ -0,0 +1,91 @@
+from arclet.letoderea import Contexts, on, publish
+from satori import Channel, EventType, User
+from satori.model import Event
+
+from arclet.entari import MessageCreatedEvent, Session
+from arclet.entari.const import ITEM_ACCOUNT, ITEM_ORIGIN_EVENT
+from arclet.entari.event.base import (
+    _INTERNAL_RESOLVED,
+    INTERNAL_ADDITIONAL_HANDLERS,
+    InternalEvent,
+    event_parse,
+    register_internal_event,
+)
+
+
+def test_gather_writes_only_origin(run, message_event):
+    event = message_event("hello")
+    context: Contexts = {}  # type: ignore
+    run(event.gather(context))
+    assert set(context) == {str(ITEM_ACCOUNT), str(ITEM_ORIGIN_EVENT)}
+
+
+def test_common_attrs_provided_on_demand(run, message_event):
+    got = []
+
+    @on(MessageCreatedEvent)
+    async def listener(channel: Channel, user: User):
+        got.append((channel.id, user.id))
+
+    try:
+        run(publish(message_event("hello", channel_id="c7", user_id="u7")))
+    finally:
+        listener.dispose()
+    assert got == [("c7", "u7")]
+
+
+class PingEvent(InternalEvent):
+    type = "entari.test/ping"
+
+
+def test_internal_resolution_memoized(account):
+    calls = []
+
+    def resolve(type_, _type, data):
+        calls.append(_type)
+        return PingEvent if _type == "ping" else None
+
+    def raw(sn, _type):
+        return Event.parse(
+            {
+                "sn": sn,
+                "type": EventType.INTERNAL.value,
+                "timestamp": 0,
+                "login": {"sn": 0, "status": 1, "platform": "test", "user": {"id": "10000"}},
+                "_type": _type,
+                "_data": {"n": sn},
+            }
+        )
+
+    register_internal_event(resolve)
+    try:
+        for sn in range(3):
+            assert type(event_parse(account, raw(sn, "ping"))) is PingEvent
+            assert type(event_parse(account, raw(sn, "pong"))) is InternalEvent
+        assert calls == ["ping", "pong"]
+    finally:
+        INTERNAL_ADDITIONAL_HANDLERS.remove(resolve)
+        _INTERNAL_RESOLVED.clear()
+
+
+def test_session_created_once_on_demand(run, message_event):
+    event = message_event("hello")
+    run(event.gather({}))  # type: ignore
+    assert event._session is None
+
+    sessions = []
+
+    @on(MessageCreatedEvent)
+    async def first(session: Session):
+        sessions.append(session)
+
+    @on(MessageCreatedEvent)
+    async def second(session: Session):
+        sessions.append(session)
+
+    try:
+        run(publish(event))
+    finally:
+        first.dispose()
+        second.dispose()
+    assert sessions[0] is sessions[1] is event._session
@@ -0,0 +1,40 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from satori.exception import ServerException
+
+from arclet.entari.governor import ApiGovernor, CircuitOpenError
+
+
+def test_cancelled_probe_releases_circuit(run):
+    governor = ApiGovernor(enabled=True, max_retries=0, failure_threshold=1, cooldown=0)
+    account = SimpleNamespace(platform="test", self_id="10000")
+
+    async def fail():
+        raise ServerException("boom")
+
+    async def hang():
+        await asyncio.sleep(10)
+
+    async def ok():
+        return "ok"
+
+    async def main():
+        with pytest.raises(ServerException):
+            await governor.call(account, "message.create", fail)
+        assert governor.breakers[("test", "10000")].state == "open"
+
+        probe = asyncio.ensure_future(governor.call(account, "message.create", hang))
+        await asyncio.sleep(0)
+        assert governor.breakers[("test", "10000")].state == "half-open"
+        with pytest.raises(CircuitOpenError):
+            await governor.call(account, "message.create", ok)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+        assert await governor.call(account, "message.create", ok) == "ok"
+        assert governor.breakers[("test", "10000")].state == "closed"
+
+    run(main())
@@ -0,0 +1,178 @@
+import asyncio
+from types import SimpleNamespace
+
+from satori import EventType
+from satori.model import Event
+
+from arclet.entari.cache import entity_cache
+from arclet.entari.core import Entari
+from arclet.entari.ingress import EventFilter, EventIngress, detach
+
+
+def raw_event(sn: int, type_: EventType = EventType.MESSAGE_CREATED, channel: str = "c1", user: str = "u1"):
+    raw = {
+        "sn": sn,
+        "type": type_.value,
+        "timestamp": 0,
+        "login": {"sn": 0, "status": 1, "platform": "test", "user": {"id": "10000"}},
+        "channel": {"id": channel, "type": 0},
+        "guild": {"id": "g1"},
+        "user": {"id": user},
+    }
+    if type_ == EventType.MESSAGE_CREATED:
+        raw["message"] = {"id": f"m{sn}", "content": "hi"}
+    return Event.parse(raw)
+
+
+def test_low_lane_does_not_block_when_full(run, account):
+    handled = []
+    gate = asyncio.Event()
+
+    async def handler(acc, event):
+        await gate.wait()
+        handled.append(event.sn)
+
+    ingress = EventIngress(handler, workers=1, queue_size=2, lanes={"guild-member-updated": "low"})
+
+    async def main():
+        ingress.start()
+        await ingress.put(account, raw_event(1))
+        await asyncio.sleep(0)  # worker 取出 1 并阻塞在 gate 上
+        await ingress.put(account, raw_event(2, EventType.GUILD_MEMBER_UPDATED))
+        await ingress.put(account, raw_event(3, EventType.GUILD_MEMBER_UPDATED))
+        # 队列已满：新的低优先级事件直接丢弃，普通事件挤掉排队中的低优先级事件
+        await asyncio.wait_for(ingress.put(account, raw_event(4, EventType.GUILD_MEMBER_UPDATED)), 1)
+        await asyncio.wait_for(ingress.put(account, raw_event(5)), 1)
+        gate.set()
+        await ingress.stop()
+
+    run(main())
+    assert handled == [1, 5, 3]
+    assert ingress.shed == {EventType.GUILD_MEMBER_UPDATED.value: 2}
+
+
+def test_filtered_events_still_invalidate_cache(run, account):
+    handled = []
+
+    async def handler(acc, event):
+        handled.append(event.sn)
+
+    app = SimpleNamespace(
+        event_filter=EventFilter(users=["u1"]),
+        ingress=EventIngress(handler),
+    )
+    key = ("member", "test", "10000", "g1", "u1")
+    entity_cache.set(key, "stale")
+    run(Entari.handle_event(app, account, raw_event(1, EventType.GUILD_MEMBER_UPDATED)))
+    assert handled == []
+    assert entity_cache.get(key) is None
+
+
+def test_drop_new_when_full(run, account):
+    handled = []
+    gate = asyncio.Event()
+
+    async def handler(acc, event):
+        await gate.wait()
+        handled.append(event.sn)
+
+    ingress = EventIngress(handler, workers=1, queue_size=1, overflow="drop_new")
+
+    async def main():
+        ingress.start()
+        await ingress.put(account, raw_event(1))
+        await asyncio.sleep(0)
+        await ingress.put(account, raw_event(2))
+        await ingress.put(account, raw_event(3))
+        gate.set()
+        await ingress.stop()
+
+    run(main())
+    assert handled == [1, 2]
+    assert ingress.dropped == 1
+
+
+def test_worker_survives_handler_error(run, account):
+    handled = []
+
+    async def handler(acc, event):
+        if event.sn == 1:
+            raise RuntimeError("boom")
+        handled.append(event.sn)
+
+    ingress = EventIngress(handler, workers=1)
+
+    async def main():
+        ingress.start()
+        await ingress.put(account, raw_event(1))
+        await ingress.put(account, raw_event(2))
+        await ingress.stop()
+
+    run(main())
+    assert handled == [2]
+
+
+def test_ordered_per_channel_parallel_across_channels(run, account):
+    events = []
+
+    async def handler(acc, event):
+        events.append(f"start {event.sn}")
+        await asyncio.sleep(0.01 if event.sn == 1 else 0)
+        events.append(f"end {event.sn}")
+
+    ingress = EventIngress(handler, workers=8, ordered=True)
+    # 选择与 c1 分片不同的频道
+    other = next(
+        f"c{i}"
+        for i in range(2, 64)
+        if ingress._select(account, raw_event(0, channel=f"c{i}")) is not ingress._select(account, raw_event(0))
+    )
+
+    async def main():
+        ingress.start()
+        await ingress.put(account, raw_event(1))
+        await ingress.put(account, raw_event(2))
+        await ingress.put(account, raw_event(3, channel=other))
+        await ingress.stop()
+
+    run(main())
+    # 同一频道的事件依次处理，其他频道的事件不必等待
+    assert events.index("end 1") < events.index("start 2")
+    assert events.index("end 3") < events.index("end 1")
+
+
+def test_detach_releases_channel(run, account):
+    events = []
+    second = asyncio.Event()
+
+    async def handler(acc, event):
+        if event.sn == 1:
+            detach()
+            await asyncio.wait_for(second.wait(), 1)
+        else:
+            second.set()
+        events.append(event.sn)
+
+    ingress = EventIngress(handler, workers=1, ordered=True)
+
+    async def main():
+        ingress.start()
+        await ingress.put(account, raw_event(1))
+        await ingress.put(account, raw_event(2))
+        await ingress.stop()
+
+    run(main())
+    assert events == [2, 1]
+
+
+def test_event_filter_rejects_raw_events(account):
+    event_filter = EventFilter(channels=["c2"], guilds=["g9"])
+    assert event_filter.reject(account, raw_event(1, user=account.self_id))
+    assert not event_filter.reject(account, raw_event(2, EventType.GUILD_MEMBER_UPDATED, user=account.self_id))
+    assert event_filter.reject(account, raw_event(3, channel="c2"))
+    assert not event_filter.reject(account, raw_event(4))
+    assert event_filter.rejected == 2
+
+    event_filter.update(users=["u1"])
+    assert not event_filter.reject(account, raw_event(5, channel="c2", user="u2"))
+    assert event_filter.reject(account, raw_event(6))
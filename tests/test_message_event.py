@@ -0,0 +1,31 @@
+from arclet.letoderea import Contexts, on, publish
+
+from arclet.entari import MessageChain, MessageCreatedEvent
+from arclet.entari.const import ITEM_MESSAGE_CONTENT
+
+
+def test_gather_does_not_parse_message(run, message_event):
+    event = message_event('<at id="10000"/> hello')
+    context: Contexts = {}  # type: ignore
+    run(event.gather(context))
+    # 提及、回复与消息内容只在订阅者请求时解析
+    assert not event._parsed
+    assert event._prepared is None
+    assert ITEM_MESSAGE_CONTENT not in context
+    assert "is_notice_me" not in context
+
+
+def test_context_items_resolved_on_demand(run, message_event):
+    event = message_event('<at id="10000"/> hello')
+    got = []
+
+    @on(MessageCreatedEvent)
+    async def notice(content: MessageChain, is_notice_me: bool, is_reply_me: bool):
+        got.append((str(content), is_notice_me, is_reply_me))
+
+    try:
+        run(publish(event))
+        run(publish(event))
+    finally:
+        notice.dispose()
+    assert got == [("hello", True, False)] * 2
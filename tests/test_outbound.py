@@ -0,0 +1,66 @@
+import asyncio
+
+from arclet.letoderea import on
+
+from arclet.entari import MessageChain
+from arclet.entari.event.send import SendRequest
+from arclet.entari.outbound import OutboundQueue, outbound
+
+
+def test_sent_in_reserve_order(run, fake_account):
+    queue = OutboundQueue(rate=1000)
+    account = fake_account
+
+    async def main():
+        tickets = [queue.reserve(account, "c1") for _ in range(3)]
+        await asyncio.gather(*(queue.submit(t, MessageChain(str(i))) for i, t in reversed(list(enumerate(tickets)))))
+
+    run(main())
+    assert account.protocol.sent == ["0", "1", "2"]
+
+
+def test_coalesce_consecutive_messages(run, fake_account):
+    queue = OutboundQueue(coalesce_window=0.02)
+    account = fake_account
+
+    async def main():
+        tickets = [queue.reserve(account, "c1") for _ in range(3)]
+        return await asyncio.gather(*(queue.submit(t, MessageChain(m)) for t, m in zip(tickets, "abc")))
+
+    results = run(main())
+    assert account.protocol.sent == ["a\nb\nc"]
+    assert queue.coalesced == 2
+    assert all(str(sent) == "a\nb\nc" for _, sent in results)
+
+
+def test_cancelled_ticket_skipped(run, fake_account):
+    queue = OutboundQueue(rate=1000)
+    account = fake_account
+
+    async def main():
+        first = queue.reserve(account, "c1")
+        second = queue.reserve(account, "c1")
+        queue.cancel(first)
+        await asyncio.wait_for(queue.submit(second, MessageChain("b")), 1)
+
+    run(main())
+    assert account.protocol.sent == ["b"]
+    assert queue.depth == 0
+
+
+def test_nested_send_during_preprocess(run, fake_account):
+    account = fake_account
+
+    @on(SendRequest)
+    async def nested(event: SendRequest):
+        # 预处理中再次发送消息不应等待外层消息的队列位置
+        if str(event.message) == "outer":
+            await account.protocol.message_create("c1", "inner")
+
+    outbound.update(rate=1000)
+    try:
+        run(asyncio.wait_for(account.protocol.message_create("c1", "outer"), 1))
+    finally:
+        outbound.update()
+        nested.dispose()
+    assert account.protocol.sent == ["inner", "outer"]
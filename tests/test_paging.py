@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+from satori.model import IterablePageResult, PageResult
+
+from arclet.entari.paging import collect_pages, readahead
+
+
+def paged(total: int, size: int, requested: list, fail_at: str | None = None):
+    async def fetch(token: str | None):
+        start = int(token or 0)
+        requested.append(start)
+        await asyncio.sleep(0)
+        if fail_at is not None and str(start) == fail_at:
+            raise RuntimeError("boom")
+        end = min(start + size, total)
+        return PageResult(list(range(start, end)), str(end) if end < total else None)
+
+    return IterablePageResult(fetch)
+
+
+def test_readahead_yields_all_items(run):
+    requested = []
+
+    async def main():
+        async with readahead(paged(7, 3, requested)) as items:
+            return [item async for item in items]
+
+    assert run(main()) == list(range(7))
+    assert requested == [0, 3, 6]
+
+
+def test_readahead_prefetches_while_consuming(run):
+    requested = []
+
+    async def main():
+        async with readahead(paged(30, 3, requested), pages=2) as items:
+            assert await items.__anext__() == 0
+            await asyncio.sleep(0.01)
+            # 后台继续请求后续的页，直到预读队列 (`pages` 页) 已满
+            return list(requested)
+
+    assert run(main()) == [0, 3, 6, 9]
+
+
+def test_collect_pages_stops_at_limit(run):
+    requested = []
+    assert run(collect_pages(paged(100, 10, requested), limit=15, pages=1)) == list(range(15))
+    assert len(requested) < 10
+
+
+def test_readahead_propagates_errors(run):
+    requested = []
+
+    async def main():
+        items = []
+        with pytest.raises(RuntimeError):
+            async with readahead(paged(10, 3, requested, fail_at="6")) as it:
+                async for item in it:
+                    items.append(item)
+        return items
+
+    assert run(main()) == list(range(6))
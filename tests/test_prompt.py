@@ -0,0 +1,59 @@
+import asyncio
+
+from arclet.letoderea import publish
+
+from arclet.entari.event.base import event_parse
+from arclet.entari.ingress import EventIngress, detach
+from arclet.entari.prompt import PromptRegistry
+
+
+def test_prompt_resolved_by_same_user(run, message_event):
+    registry = PromptRegistry()
+    first = message_event("ask")
+
+    async def main():
+        waiting = asyncio.ensure_future(registry.wait(first.account, first.channel, first.user, 1, False, 0))
+        await asyncio.sleep(0)
+        assert len(registry) == 1
+        await publish(message_event("other", user_id="u2"))
+        await publish(message_event("other channel", channel_id="c2"))
+        assert not waiting.done()
+        await publish(message_event("answer"))
+        return await waiting
+
+    assert str(run(main())) == "answer"
+    assert len(registry) == 0
+    assert not registry._subscribers
+
+
+def test_prompt_timeout_cleans_up(run, message_event):
+    registry = PromptRegistry()
+    event = message_event("ask")
+    assert run(registry.wait(event.account, event.channel, event.user, 0.01, False, 0)) is None
+    assert len(registry) == 0
+    assert not registry._subscribers
+
+
+def test_prompt_with_detach_in_ordered_ingress(run, account, message_event):
+    registry = PromptRegistry()
+    replies = []
+
+    async def handler(acc, raw):
+        event = event_parse(acc, raw)
+        if str(event.content) == "ask":
+            # 不分离时，同一频道的下一条消息会排在当前事件之后，等待将一直持续到超时
+            detach()
+            replies.append(await registry.wait(acc, event.channel, event.user, 1, False, 0))
+        else:
+            await publish(event)
+
+    ingress = EventIngress(handler, workers=1, ordered=True)
+
+    async def main():
+        ingress.start()
+        await ingress.put(account, message_event("ask")._origin)
+        await ingress.put(account, message_event("answer")._origin)
+        await ingress.stop()
+
+    run(main())
+    assert [str(reply) for reply in replies] == ["answer"]
@@ -0,0 +1,23 @@
+from satori import Button, Text
+from satori.element import Bold, Custom
+
+from arclet.entari.session import scan_elements
+
+
+def test_scan_plain_message():
+    assert scan_elements([Text("hello"), Text("world")]) == (False, False)
+
+
+def test_scan_nested_button_and_component():
+    assert scan_elements([Bold("a", Button.action("btn"))]) == (False, True)
+    assert scan_elements([Text("a"), Custom("component", {"is": "x"})]) == (True, False)
+
+
+def test_plain_message_sent_unchanged(run, fake_account):
+    run(fake_account.protocol.message_create("c1", "hello"))
+    assert fake_account.protocol.sent == ["hello"]
+
+
+def test_button_gets_id(run, fake_account):
+    run(fake_account.protocol.message_create("c1", [Text("pick"), Button.action("")]))
+    assert 'id="' in fake_account.protocol.sent[0]
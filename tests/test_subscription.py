@@ -0,0 +1,84 @@
+from arclet.letoderea import make_event, on
+from arclet.letoderea.scope import Scope
+
+from arclet.entari.event.subscription import has_subscribers
+from arclet.entari.plugin import RootlessPlugin
+
+
+@make_event(name="entari.test/subscription")
+class _Probe:
+    pass
+
+
+def test_plugin_subscribers_tracked():
+    event = _Probe()
+    assert not has_subscribers(event)
+
+    subs = []
+
+    def plugin(plg: RootlessPlugin):
+        @plg.dispatch(_Probe)
+        async def listener():
+            pass
+
+        subs.append(listener)
+
+    plg = RootlessPlugin(".test_subscription", plugin, {})
+    try:
+        assert has_subscribers(event)
+        plg._scope.disable()
+        assert not has_subscribers(event)
+        plg._scope.enable()
+        assert has_subscribers(event)
+        subs[0].dispose()
+        assert not has_subscribers(event)
+    finally:
+        plg.dispose()
+    assert not has_subscribers(event)
+
+
+def test_global_subscribers_tracked():
+    event = _Probe()
+    assert not has_subscribers(event)
+
+    @on(_Probe)
+    async def listener():
+        pass
+
+    assert has_subscribers(event)
+    listener.dispose()
+    assert not has_subscribers(event)
+
+
+@make_event(name="entari.test/subscription/other")
+class _Other:
+    pass
+
+
+def test_non_plugin_scope_tracked():
+    event = _Probe()
+    scope = Scope.of("entari.test/subscription")
+    try:
+        assert not has_subscribers(event)
+
+        @scope.register(event=_Other)
+        async def other():
+            pass
+
+        assert not has_subscribers(event)
+
+        # 两次检查之间先注册再移除，订阅者数量不变
+        @scope.register(event=_Probe)
+        async def listener():
+            pass
+
+        other.dispose()
+        assert has_subscribers(event)
+
+        scope.disable()
+        assert not has_subscribers(event)
+        scope.enable()
+        assert has_subscribers(event)
+    finally:
+        scope.dispose()
+    assert not has_subscribers(event)
@@ -0,0 +1,74 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from satori import Image, Text
+from satori.exception import ApiNotAvailable
+
+from arclet.entari import MessageChain
+from arclet.entari.upload import UploadCache
+
+
+class UploadProtocol:
+    def __init__(self, self_id: str, available: bool = True):
+        self.self_id = self_id
+        self.available = available
+        self.uploaded: list[bytes] = []
+
+    async def upload_create(self, *uploads):
+        if not self.available:
+            raise ApiNotAvailable
+        await asyncio.sleep(0)
+        self.uploaded.extend(upload.file for upload in uploads)
+        return [f"https://cdn/{self.self_id}/{len(self.uploaded)}"]
+
+
+def upload_account(self_id: str = "10000", available: bool = True):
+    return SimpleNamespace(platform="test", self_id=self_id, protocol=UploadProtocol(self_id, available))
+
+
+@pytest.fixture
+def cache_file(tmp_path, monkeypatch):
+    path = tmp_path / "uploads.json"
+    monkeypatch.setattr(UploadCache, "path", property(lambda self: path))
+    return path
+
+
+def test_same_content_uploaded_once(run, cache_file):
+    cache = UploadCache(enabled=True)
+    account, other = upload_account(), upload_account("20000")
+
+    async def main():
+        return await asyncio.gather(
+            cache.upload(account, b"png", "image/png"),
+            cache.upload(account, b"png", "image/png"),
+            cache.upload(other, b"png", "image/png"),
+        )
+
+    first, second, third = run(main())
+    assert first == second != third
+    assert account.protocol.uploaded == [b"png"]
+    assert (cache.misses, cache.hits) == (2, 1)
+    # 缓存持久化后，新的实例同样可以复用地址
+    assert UploadCache(enabled=True).get(account, next(iter(cache.data))[0]) == first
+
+
+def test_rewrite_replaces_local_resources(run, cache_file):
+    cache = UploadCache(enabled=True)
+    account = upload_account()
+    message = MessageChain([Text("look"), Image("data:image/png;base64,cG5n")])
+    result = run(cache.rewrite(account, message))
+    assert result is not message
+    assert result[1].src == "https://cdn/10000/1"
+    assert message[1].src.startswith("data:")
+    assert account.protocol.uploaded == [b"png"]
+    plain = MessageChain([Text("plain")])
+    assert run(cache.rewrite(account, plain)) is plain
+
+
+def test_rewrite_skips_accounts_without_upload(run, cache_file):
+    cache = UploadCache(enabled=True)
+    account = upload_account(available=False)
+    message = MessageChain([Image("data:image/png;base64,cG5n")])
+    assert run(cache.rewrite(account, message))[0].src.startswith("data:")
+    assert ("test", "10000") in cache._unsupported